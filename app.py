@@ -1,14 +1,95 @@
 import streamlit as st
-import json
-from src.components.fetch_pdf_content import RBINotificationPDFExtractorTool
-from src.components.fetch_rbi_links import RBIFetchTool
-from src.components.elasticsearch_oper import ElasticSearchTool
-from src.components.circular_analyzer import (run_analysis, create_analysis_task, create_circular_analyser,
-                                              run_comparison, create_circular_comparator,create_comparison_task)
+import logging
+import os
+import threading
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from src.components.elasticsearch_oper import HEAVY_FIELDS, ElasticSearchTool, is_analysed
+from src.utils.metrics import metrics
 from src.utils.output_handler import capture_output
 
+# Seconds between checks for finished background comparisons
+COMPARISON_POLL_SECONDS = float(os.getenv("COMPARISON_POLL_SECONDS", "2"))
+
+# ✅ Logging is configured here only, LOG_LEVEL=DEBUG for the full trace
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s - %(levelname)s - %(message)s")
+
+#--------------------------------#
+#        Cached Resources        #
+#--------------------------------#
+# Streamlit re-runs main() on every interaction; these are built once per process and
+# the heavy crewai / chromadb / fitz imports happen on first use instead of at startup.
+@st.cache_resource
+def get_elastic():
+    # Flush every document as soon as it is analysed, and wait for it to be searchable
+    return ElasticSearchTool(batch_size=1, refresh="wait_for")
+
+
+@st.cache_resource
+def get_service():
+    # Analyser and comparator crews built once and reused for every circular and rerun
+    from src.components.circular_analyzer import get_circular_service
+    return get_circular_service()
+
+
+@st.cache_resource
+def start_metrics_server():
+    # Prometheus endpoint on METRICS_PORT, started once per process
+    return metrics.start_server()
+
+
+@st.cache_resource
+def get_jobs():
+    # Worker pool precomputing circular-vs-policy comparisons in the background
+    from src.components.comparison_jobs import get_comparison_jobs
+    return get_comparison_jobs()
+
+
+def show_metrics():
+    """Summary of the stage timings, tokens and bytes recorded by this process."""
+    with st.expander("Pipeline metrics"):
+        rows = metrics.summary_rows()
+        if rows:
+            st.table(rows)
+        counters = metrics.snapshot()["counters"]
+        if counters:
+            st.json(counters, expanded=False)
+        if not rows and not counters:
+            st.write("Nothing recorded yet.")
+
+
+COMPARISON_FINISHED = ("done", "failed")
+
+
+@st.fragment(run_every=COMPARISON_POLL_SECONDS)
+def wait_for_comparison(record):
+    """Re-poll only this fragment while the comparison is pending, then rerun the page once to show it."""
+    job = get_jobs().status(record)
+    if job is not None and job["status"] in COMPARISON_FINISHED:
+        # The finished comparison is rendered outside this fragment, which stops the polling
+        st.rerun()
+    st.info(f"Comparison {job['status'] if job else 'queued'}, this updates automatically...")
+
+
+def show_comparison(record):
+    """Render the background comparison for ``record``, polling only while it is queued or running."""
+    jobs = get_jobs()
+    job = jobs.status(record)
+    if job is None:
+        jobs.submit(record)
+    if job is None or job["status"] not in COMPARISON_FINISHED:
+        wait_for_comparison(record)
+    elif job["status"] == "done":
+        st.write(job["result"])
+    else:
+        st.error(f"Comparison failed: {job['error']}")
+        if st.button("Retry comparison"):
+            jobs.retry(record)
+            st.rerun()
+
+
 def main():
     st.set_page_config(page_title="RBI Compliance Tracker", layout="wide")
+    start_metrics_server()
     st.title("RBI Compliance Tracker")
 
     # Ask the user for a date input
@@ -16,34 +97,66 @@ def main():
     # Convert the date to a string in the desired format
     date_str = user_date.strftime("%b %d, %Y")
     st.write(f"You selected: {user_date}")
+    force_refresh = st.checkbox("Force refresh (ignore cached analyses)")
     
-    eb = ElasticSearchTool()
-    if st.button(f"Check RBI circular"):
+    eb = get_elastic()
+    # Serve circulars analysed earlier straight from ElasticSearch instead of re-running the crew
+    # Circulars indexed by a --skip-analysis ingest are left to the crew below
+    stored = [] if force_refresh else [record for record in eb.get_circulars_for_date(date_str)
+                                       if is_analysed(record)]
+    # Circulars analysed by a run in this session are kept across reruns (selectbox changes, a finished
+    # comparison), including forced runs whose results are not read back from ElasticSearch
+    results_key = f"analysis_results:{date_str}"
+    stored_ids = {record["downloaded_url"] for record in stored}
+    final_analysis_result = stored + [record for record in st.session_state.get(results_key, [])
+                                      if record["downloaded_url"] not in stored_ids]
+    if stored:
+        st.success(f"Showing {len(stored)} analysed RBI circulars for {date_str} from ElasticSearch")
+        # Comparisons already done are deduplicated, only missing ones are queued
+        get_jobs().submit_all(stored)
+    # Still offered once some circulars are stored: only the missing or failed ones are run, through the cache
+    if st.button("Check RBI circulars not analysed yet" if stored else "Check RBI circular"):
         st.info("Running CrewAI Agentic workflow...")
+        from src.components.pipeline import CircularPipeline, notifications_for_date, skip_stored
         with st.status("🤖 Extracting circular...", expanded=True) as status:
             try:
-                final_analysis_result = []
-                tool1 = RBIFetchTool()._run(date_str)
-                tool2 = json.loads(RBINotificationPDFExtractorTool()._run(json.loads(tool1)))
-                st.write(f"Total {len(tool2)} RBI circulars found for {date_str}")
                 # Create persistent container for process output with fixed height.
                 process_container = st.container(height=300, border=True)
                 output_container = process_container.container()
-                for circular_dict in tool2:
-                    # Single output capture context.
-                    with capture_output(output_container):
-                        analyser = create_circular_analyser()
-                        task = create_analysis_task(analyser, json.dumps(circular_dict))
-                        result = run_analysis(analyser, task)
-                        circular_dict.update(json.loads(result.raw))
-                        eb.store_in_elastic(circular_dict)
-                        final_analysis_result.append(circular_dict)
+                # Attach the Streamlit script context to the pipeline threads so their output renders
+                script_ctx = get_script_run_ctx()
+                pipeline = CircularPipeline(
+                    eb=eb, force_refresh=force_refresh, service=get_service(),
+                    initializer=lambda: add_script_run_ctx(threading.current_thread(), script_ctx))
+                analysed = {}
+                total = 0
+                with capture_output(output_container):
+                    for event in pipeline.run(skip_stored(notifications_for_date(date_str), stored)):
+                        if event["event"] == "found":
+                            total = event["count"]
+                            st.write(f"Total {total} RBI circulars to analyse for {date_str}")
+                        elif event["event"] == "indexed" and event["ok"]:
+                            analysed[event["seq"]] = event["circular"]
+                            status.update(label=f"🤖 Analysed {len(analysed)} of {total} circulars...")
+                        elif event["event"] in ("indexed", "failed"):
+                            name = (event["circular"] or {}).get("name", "RBI circular listing")
+                            st.warning(f"{name} failed: {event['error']}")
+                if not total:
+                    st.write(f"No RBI circulars left to analyse for {date_str}")
+                # Keep the circulars in the order RBI lists them, in the same shape the read path returns
+                fresh = [{key: value for key, value in analysed[seq].items() if key not in HEAVY_FIELDS}
+                         for seq in sorted(analysed)]
+                final_analysis_result = stored + fresh
+                st.session_state[results_key] = fresh
+                # Start comparing every new circular while the user reads the analyses
+                get_jobs().submit_all(fresh, force_refresh=force_refresh)
                 status.update(label="Analysis completed and stored in ElasticSearch!", state="complete", expanded=False)
             except Exception as e:
                 status.update(label="❌ Error occurred", state="error")
                 st.error(f"An error occurred: {str(e)}")
                 st.stop()
 
+    if final_analysis_result:
         # Create a list of options based on a unique field (like "id" or "name")
         options = [f"{record['name']}" for record in final_analysis_result]
 
@@ -56,12 +169,14 @@ def main():
         # Display the full result for the selected record in the "Analysis" tab (left column)
         st.write(f"### Full details of {selected_record['name']}:")
         st.write(selected_record)
+        # The full text is only fetched from the compressed text index when asked for
+        if selected_record.get("text_hash") and st.toggle("Show full circular text"):
+            st.text(eb.get_text(selected_record["text_hash"]) or "The text of this circular is not stored.")
     
         st.header("Comparsion of selected circular with current company's policy")
-        comparator = create_circular_comparator()
-        comparison_task = create_comparison_task(comparator,selected_record)
-        comp_result = run_comparison(comparator, comparison_task)
-        st.write(json.loads(comp_result.raw))
+        show_comparison(selected_record)
+
+    show_metrics()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""Per-circular crew overhead with and without the reusable CircularService.
+
+The LLM call is replaced by a canned answer (plus optional latency), so the timings
+show what building the Agent/Task/Crew and kicking it off costs per circular:
+
+    python -m benchmarks.bench_agent_reuse --circulars 50
+    python -m benchmarks.bench_agent_reuse --circulars 20 --llm-latency 0.05
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+# Keep benchmark runs out of the real result cache, and let CrewAI build its LLM offline
+os.environ["ANALYSIS_CACHE_DB"] = os.path.join(tempfile.mkdtemp(), "bench_cache.sqlite3")
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from crewai import LLM  # noqa: E402
+from src.components.circular_analyzer import (CircularService, _analysis_context, create_analysis_task,  # noqa: E402
+                                              create_circular_analyser, run_analysis)
+
+CANNED_ANALYSIS = json.dumps({"summary": "", "compliance_types": [], "compliance_types_details": []})
+
+
+def stub_llm(latency):
+    def call(self, messages, *args, **kwargs):
+        if latency:
+            time.sleep(latency)
+        return f"Thought: I now know the final answer\nFinal Answer: {CANNED_ANALYSIS}"
+    LLM.call = call
+
+
+def contexts(count):
+    return [_analysis_context({"name": f"Circular {index}", "circular_date": "Feb 13, 2025"},
+                              f"Banks shall update KYC records, paragraph {index}.")
+            for index in range(count)]
+
+
+def rebuild_per_circular(context):
+    analyser = create_circular_analyser()
+    task = create_analysis_task(analyser, context)
+    return run_analysis(analyser, task, cache_text=context, force_refresh=True)
+
+
+def timed(func, items):
+    timings = []
+    for item in items:
+        started = time.perf_counter()
+        func(item)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(label, timings):
+    print(f"{label:<22} mean {statistics.mean(timings) * 1000:8.2f}ms  "
+          f"p50 {statistics.median(timings) * 1000:8.2f}ms  max {max(timings) * 1000:8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--circulars", type=int, default=30, help="Circulars analysed per variant")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the stub LLM sleeps per call")
+    args = parser.parse_args()
+
+    stub_llm(args.llm_latency)
+    items = contexts(args.circulars)
+    baseline = timed(rebuild_per_circular, items)
+    service = CircularService(workers=1)
+    reused = timed(lambda context: service.analyse(context, force_refresh=True), items)
+
+    report("rebuild per circular", baseline)
+    report("CircularService", reused)
+    saved = statistics.mean(baseline) - statistics.mean(reused)
+    print(f"overhead saved per circular: {saved * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Microbenchmark for the RBI listing page parser.
+
+Checks that the strained single-pass parser returns exactly what the original
+html.parser + per-row ``find`` extractor returned, and reports the speedup.
+
+Record fixtures once (needs network), then benchmark offline:
+
+    python -m benchmarks.bench_listing_parser --record 2025-02
+    python -m benchmarks.bench_listing_parser benchmarks/fixtures/*.html
+
+Without recorded fixtures a synthetic month listing with the same page structure
+(``benchmarks.standins.synthetic_listing``) is used, so the check always runs offline.
+"""
+import argparse
+import glob
+import os
+import timeit
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from src.components.fetch_rbi_links import (BASE_URL, HTML_PARSER, RBIFetchTool, get_session,
+                                            parse_month_listing)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def legacy_parse_month_listing(content):
+    """The extractor as it was before the fast path, kept as the reference output."""
+    soup = BeautifulSoup(content, "html.parser")
+    content_div = soup.find('div', {'id': 'pnlDetails'})
+    if not content_div:
+        return None
+    notifications = {}
+    current_date = None
+    current_notifications = []
+    for row in content_div.find_all('tr'):
+        date_header = row.find('td', class_='tableheader')
+        if date_header:
+            if current_date:
+                notifications[current_date] = current_notifications
+            current_date = date_header.get_text(strip=True)
+            current_notifications = []
+        elif current_date:
+            notification_link = row.find('a', class_='link2')
+            pdf_link_tag = row.find_all('a', href=True)
+            if notification_link:
+                pdf_url = None
+                if len(pdf_link_tag) > 1:
+                    pdf_url = urljoin(BASE_URL, pdf_link_tag[1]['href'])
+                current_notifications.append({
+                    'name': notification_link.get_text(strip=True),
+                    'notification_url': urljoin(BASE_URL, notification_link.get('href')),
+                    'pdf_url': pdf_url,
+                    'circular_date': current_date
+                })
+    if current_date:
+        notifications[current_date] = current_notifications
+    return notifications
+
+
+def record_fixture(year_month):
+    """Save the raw month listing HTML for ``YYYY-MM`` into the fixtures directory."""
+    year, month = (int(part) for part in year_month.split("-"))
+    session = get_session()
+    form_data = RBIFetchTool().fetch_form_data(session)
+    form_data.update({"hdnYear": str(year), "hdnMonth": str(month)})
+    response = session.post(BASE_URL, data=form_data)
+    response.raise_for_status()
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    path = os.path.join(FIXTURES_DIR, f"listing_{year}_{month:02d}.html")
+    with open(path, "wb") as file:
+        file.write(response.content)
+    print(f"Saved {path} ({len(response.content)} bytes)")
+
+
+def load_pages(paths):
+    """``(label, HTML)`` pairs for the benchmark: the given pages, else a synthetic month listing."""
+    if not paths:
+        from benchmarks.standins import synthetic_listing
+        return [("synthetic listing 2025-02", synthetic_listing(2025, 2, per_day=6, days=28))]
+    pages = []
+    for path in paths:
+        with open(path, "rb") as file:
+            pages.append((os.path.basename(path), file.read()))
+    return pages
+
+
+def bench(pages, repeat=5):
+    for path, content in pages:
+        expected = legacy_parse_month_listing(content)
+        fast = parse_month_listing(content)
+        fallback = parse_month_listing(content, parser="html.parser")
+        assert fast == expected, f"{path}: {HTML_PARSER} fast path differs from the legacy parser"
+        assert fallback == expected, f"{path}: html.parser fallback differs from the legacy parser"
+
+        legacy_time = min(timeit.repeat(lambda: legacy_parse_month_listing(content), number=1, repeat=repeat))
+        fast_time = min(timeit.repeat(lambda: parse_month_listing(content), number=1, repeat=repeat))
+        fallback_time = min(timeit.repeat(lambda: parse_month_listing(content, parser="html.parser"),
+                                          number=1, repeat=repeat))
+        rows = sum(len(items) for items in (expected or {}).values())
+        print(f"{path}: {len(content)} bytes, {rows} notifications")
+        print(f"  legacy html.parser       {legacy_time * 1000:8.2f} ms")
+        print(f"  strained html.parser     {fallback_time * 1000:8.2f} ms  ({legacy_time / fallback_time:.1f}x)")
+        print(f"  strained {HTML_PARSER:<15} {fast_time * 1000:8.2f} ms  ({legacy_time / fast_time:.1f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*",
+                        help="Saved listing pages, defaults to benchmarks/fixtures/*.html or a synthetic listing")
+    parser.add_argument("--record", metavar="YYYY-MM", help="Download and save a month listing fixture")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    if args.record:
+        record_fixture(args.record)
+        return
+    paths = args.paths or sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))
+    if not paths:
+        print("No recorded fixtures, benchmarking a synthetic listing (record one with --record YYYY-MM)")
+    bench(load_pages(paths), repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Startup benchmark for the Streamlit app.
+
+Measures the cold import of ``app`` in a fresh interpreter (with the slowest
+modules from ``-X importtime``) and the latency of a warm rerun, and exits
+non-zero when either exceeds its budget:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --cold-budget 2.5 --warm-budget 0.2
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from benchmarks.suite import APP_PATH
+
+
+def cold_import(module="app", top=10):
+    """Import ``module`` in a fresh interpreter, returning (seconds, slowest modules)."""
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True, check=True, cwd=os.path.dirname(APP_PATH))
+    elapsed = time.perf_counter() - started
+    modules = []
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.append((int(cumulative) / 1e6, name.strip()))
+    top_level = [entry for entry in modules if "." not in entry[1]]
+    return elapsed, sorted(top_level, reverse=True)[:top]
+
+
+def warm_rerun(script=APP_PATH, reruns=5):
+    """Median seconds of a rerun once the first run has populated the resource caches."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(script, default_timeout=60)
+    app.run()
+    timings = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cold-budget", type=float, default=3.0, help="Seconds allowed for the cold import")
+    parser.add_argument("--warm-budget", type=float, default=0.3, help="Seconds allowed for a warm rerun")
+    parser.add_argument("--skip-warm", action="store_true", help="Only measure the cold import")
+    args = parser.parse_args()
+
+    cold, slowest = cold_import()
+    print(f"cold import: {cold:.2f}s (budget {args.cold_budget:.2f}s)")
+    for seconds, name in slowest:
+        print(f"  {seconds:7.3f}s  {name}")
+    failed = cold > args.cold_budget
+
+    if not args.skip_warm:
+        warm = warm_rerun()
+        print(f"warm rerun:  {warm * 1000:.0f}ms (budget {args.warm_budget * 1000:.0f}ms)")
+        failed = failed or warm > args.warm_budget
+
+    if failed:
+        print("startup budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
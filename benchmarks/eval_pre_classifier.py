@@ -0,0 +1,87 @@
+"""Evaluate the local pre-classifier against saved LLM analysis outputs.
+
+The input is a JSONL file of analysed circulars (as returned by
+``ElasticSearchTool.search(include_text=True)``), each with ``circular_text`` and the
+LLM's ``compliance_types`` / ``compliance_types_details``:
+
+    python -m benchmarks.eval_pre_classifier analysed_circulars.jsonl
+    python -m benchmarks.eval_pre_classifier analysed_circulars.jsonl --train-model preclassifier.pkl
+"""
+import argparse
+import json
+from src.components.pre_classifier import (COMPLIANCE_TYPES, PreClassifier, TfidfPreClassifier,
+                                           canonical_types)
+
+
+def load_records(path):
+    records = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("analysis_skipped"):
+                # Skipped by an earlier pre-filter run, there is no LLM label to compare with
+                continue
+            details = [detail.get("type") for detail in record.get("compliance_types_details") or []]
+            labels = canonical_types(details or record.get("compliance_types"))
+            records.append((record.get("circular_text") or "", labels))
+    return records
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else float("nan")
+
+
+def evaluate(classifier, records):
+    """Per-category precision/recall plus how often a circular the LLM tagged would be skipped."""
+    counts = {category: {"tp": 0, "fp": 0, "fn": 0} for category in COMPLIANCE_TYPES}
+    skipped = skipped_relevant = relevant = 0
+    for text, labels in records:
+        predicted = set(classifier.tag(text))
+        for category in COMPLIANCE_TYPES:
+            if category in predicted and category in labels:
+                counts[category]["tp"] += 1
+            elif category in predicted:
+                counts[category]["fp"] += 1
+            elif category in labels:
+                counts[category]["fn"] += 1
+        relevant += bool(labels)
+        if not predicted:
+            skipped += 1
+            skipped_relevant += bool(labels)
+
+    print(f"{'category':<34}{'precision':>10}{'recall':>10}{'support':>10}")
+    for category, count in counts.items():
+        precision = _ratio(count["tp"], count["tp"] + count["fp"])
+        recall = _ratio(count["tp"], count["tp"] + count["fn"])
+        print(f"{category:<34}{precision:>10.3f}{recall:>10.3f}{count['tp'] + count['fn']:>10}")
+    print(f"\n{len(records)} circulars, {skipped} would skip the LLM "
+          f"({_ratio(skipped, len(records)):.1%}); {skipped_relevant} of {relevant} LLM-tagged circulars "
+          f"would be wrongly skipped (skip-safety recall {1 - _ratio(skipped_relevant, relevant):.3f})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="JSONL of analysed circulars")
+    parser.add_argument("--train-model", metavar="PATH",
+                        help="Fit a TF-IDF model on the first 80%% of records, save it and evaluate on the rest")
+    args = parser.parse_args(argv)
+    records = load_records(args.path)
+
+    if args.train_model:
+        split = int(len(records) * 0.8)
+        train, test = records[:split], records[split:]
+        model = TfidfPreClassifier().fit([text for text, _ in train], [labels for _, labels in train])
+        model.save(args.train_model)
+        print(f"Saved model trained on {len(train)} circulars to {args.train_model}\n")
+        print("== keyword rules ==")
+        evaluate(PreClassifier(), test)
+        print("\n== keyword rules + TF-IDF ==")
+        evaluate(PreClassifier(model=model), test)
+    else:
+        evaluate(PreClassifier.from_env(), records)
+
+
+if __name__ == "__main__":
+    main()
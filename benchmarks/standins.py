@@ -0,0 +1,269 @@
+"""Offline stand-ins for rbi.org.in, Elasticsearch and the LLM, used by the benchmark suite.
+
+Recorded fixtures are replayed when present (listing pages from
+``bench_listing_parser --record``, PDFs from ``suite --record-pdfs``); otherwise
+synthetic listing pages and PDFs with the same structure are generated, so the
+suite always runs without network access.
+"""
+import glob
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import date
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+PDF_FIXTURES_DIR = os.path.join(FIXTURES_DIR, "pdfs")
+
+
+def configure_environment(workdir=None):
+    """Point every on-disk store at a scratch directory. Call before importing ``src``."""
+    workdir = workdir or tempfile.mkdtemp(prefix="circulars-bench-")
+    os.makedirs(os.path.join(workdir, "policies"), exist_ok=True)
+    os.environ.update({
+        "ANALYSIS_CACHE_DB": os.path.join(workdir, "analysis_cache.sqlite3"),
+        "INGEST_STATE_DB": os.path.join(workdir, "ingest_state.sqlite3"),
+        "JOB_QUEUE_DB": os.path.join(workdir, "jobs.sqlite3"),
+        "SIMILARITY_INDEX_PATH": os.path.join(workdir, "similarity_index.npz"),
+        "PDF_CACHE_DIR": os.path.join(workdir, "pdf_cache"),
+        "POLICY_DIR": os.path.join(workdir, "policies"),
+        "POLICY_STORE_PATH": workdir,
+        "METRICS_PORT": "",
+    })
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    return workdir
+
+#--------------------------------#
+#       Fixtures / Synthetic     #
+#--------------------------------#
+WORDS = ("bank", "customer", "due", "diligence", "account", "branch", "report", "transaction", "foreign",
+         "exchange", "remittance", "borrower", "loan", "restructuring", "grievance", "redressal", "ombudsman",
+         "authorised", "dealer", "entity", "regulated", "period", "compliance", "direction", "master", "annex")
+KEYWORDS = ("KYC", "money laundering", "grievance redressal", "FEMA", "export", "restructuring")
+
+
+def synthetic_text(seed, sections=12):
+    generator = random.Random(seed)
+    lines = []
+    for number in range(1, sections + 1):
+        words = [generator.choice(WORDS) for _ in range(generator.randint(60, 140))]
+        words.insert(generator.randrange(len(words)), generator.choice(KEYWORDS))
+        lines.append(f"{number}. {' '.join(words)}.")
+    return "\n\n".join(lines)
+
+
+def synthetic_pdf(seed, sections=12):
+    """A small text PDF, built with PyMuPDF like the PDFs the extractor parses."""
+    import fitz
+    doc = fitz.open()
+    text = synthetic_text(seed, sections)
+    for start in range(0, len(text), 2500):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(40, 40, 555, 800), text[start:start + 2500], fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def synthetic_listing(year, month, per_day=4, days=5):
+    """A month listing page with the hidden form fields and table layout of the RBI notifications page."""
+    rows = []
+    for day in range(1, days + 1):
+        listed = date(year, month, day).strftime("%b %d, %Y")
+        rows.append(f'<tr><td class="tableheader" colspan="2"><b>{listed}</b></td></tr>')
+        for index in range(per_day):
+            name = f"NT{year}{month:02d}{day:02d}{index}"
+            rows.append(f'<tr><td><a class="link2" href="NotificationUser.aspx?Id={name}">Circular {name}</a></td>'
+                        f'<td><a href="https://rbidocs.rbi.org.in/rdocs/notification/PDFs/{name}.PDF">PDF</a></td></tr>')
+    hidden = "".join(f'<input type="hidden" name="{field}" id="{field}" value="bench" />'
+                     for field in ("__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION"))
+    return (f'<html><body><form method="post" action="./BS_ViewMasterCirculardetails.aspx">{hidden}'
+            f'<div id="pnlDetails"><table>{"".join(rows)}</table></div></form></body></html>').encode("utf-8")
+
+
+def listing_fixtures():
+    return sorted(glob.glob(os.path.join(FIXTURES_DIR, "listing_*.html")))
+
+
+def pdf_fixtures():
+    return sorted(glob.glob(os.path.join(PDF_FIXTURES_DIR, "*.pdf")) +
+                  glob.glob(os.path.join(PDF_FIXTURES_DIR, "*.PDF")))
+
+#--------------------------------#
+#        HTTP Replay Session     #
+#--------------------------------#
+class FixtureResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size=8192):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+class FixtureSession:
+    """``requests.Session`` stand-in replaying listing pages and PDFs, with optional latency per request."""
+
+    def __init__(self, latency=0.0, synthetic_year=2025, synthetic_month=2):
+        self.latency = latency
+        self.synthetic = (synthetic_year, synthetic_month)
+        self.listings = {}
+        for path in listing_fixtures():
+            _, year, month = os.path.basename(path)[:-len(".html")].split("_")
+            with open(path, "rb") as file:
+                self.listings[(int(year), int(month))] = file.read()
+        if not self.listings:
+            self.listings[self.synthetic] = synthetic_listing(*self.synthetic)
+        self.pdf_paths = pdf_fixtures()
+        self._pdfs = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def mount(self, *args):
+        pass
+
+    def _wait(self):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _pdf(self, url):
+        name = url.rsplit("/", 1)[-1]
+        with self._lock:
+            if name not in self._pdfs:
+                recorded = [path for path in self.pdf_paths if os.path.basename(path).lower() == name.lower()]
+                if recorded or self.pdf_paths:
+                    # Unrecorded circulars replay a recorded PDF, chosen stably by name
+                    path = recorded[0] if recorded else self.pdf_paths[sum(map(ord, name)) % len(self.pdf_paths)]
+                    with open(path, "rb") as file:
+                        self._pdfs[name] = file.read()
+                else:
+                    self._pdfs[name] = synthetic_pdf(name)
+            return self._pdfs[name]
+
+    def get(self, url, headers=None, stream=False, **kwargs):
+        self._wait()
+        if url.lower().endswith(".pdf"):
+            return FixtureResponse(200, self._pdf(url), {"Content-Type": "application/pdf"})
+        # The landing page carries the same hidden form fields as any listing
+        return FixtureResponse(200, next(iter(self.listings.values())))
+
+    def post(self, url, data=None, **kwargs):
+        self._wait()
+        content = self.listings.get((int(data["hdnYear"]), int(data["hdnMonth"])))
+        return FixtureResponse(200, content) if content else FixtureResponse(404)
+
+    def listed_dates(self):
+        """``(year, month)`` pages this session can serve."""
+        return sorted(self.listings)
+
+#--------------------------------#
+#      In-memory Elasticsearch   #
+#--------------------------------#
+def in_memory_elastic(latency=0.0):
+    """An ``ElasticSearchTool`` whose record and text indices are dicts, with optional latency per request."""
+    from src.components import elasticsearch_oper
+
+    class InMemoryElasticSearchTool(elasticsearch_oper.ElasticSearchTool):
+        documents = {}
+        texts = {}
+        documents_lock = threading.Lock()
+
+        def bulk_store(self, documents):
+            if not documents:
+                return []
+            if latency:
+                time.sleep(latency)
+            with self.documents_lock:
+                for document in documents:
+                    record, entry = elasticsearch_oper.split_document(document)
+                    if entry:
+                        self.texts.setdefault(record["text_hash"], entry["compressed"])
+                    # Round-trip through JSON, as a real index would
+                    self.documents[record["downloaded_url"]] = json.loads(json.dumps(record))
+            elasticsearch_oper.query_cache.invalidate()
+            return [(document["downloaded_url"], True, None) for document in documents]
+
+        def _text(self, document):
+            compressed = self.texts.get(document.get("text_hash"))
+            return elasticsearch_oper.decompress_text(compressed) if compressed else ""
+
+        def search(self, circular_date=None, compliance_types=None, text=None, size=50, search_after=None,
+                   include_text=False):
+            if latency:
+                time.sleep(latency)
+            with self.documents_lock:
+                hits = sorted((doc for doc in self.documents.values()
+                               if (not circular_date or doc.get("circular_date") == circular_date) and
+                               (not compliance_types or set(compliance_types) & set(
+                                   (doc.get("compliance_types") or []) + (doc.get("pre_classifier_tags") or []))) and
+                               (not text or text.lower() in (doc.get("summary", "") + self._text(doc)).lower())),
+                              key=lambda doc: doc["downloaded_url"])
+            if search_after:
+                hits = [doc for doc in hits if doc["downloaded_url"] > search_after[0]]
+            page = [dict(doc) for doc in hits[:size]]
+            return {"hits": self.attach_text(page) if include_text else page, "total": len(hits),
+                    "next": [page[-1]["downloaded_url"]] if len(page) == size else None}
+
+        def get_texts(self, text_hashes):
+            if latency:
+                time.sleep(latency)
+            with self.documents_lock:
+                return {key: elasticsearch_oper.decompress_text(self.texts[key])
+                        for key in text_hashes if key in self.texts}
+
+        def get_circular(self, doc_id, include_text=True):
+            if latency:
+                time.sleep(latency)
+            with self.documents_lock:
+                document = self.documents.get(doc_id)
+            if document is None:
+                return None
+            return self.attach_text([dict(document)])[0] if include_text else dict(document)
+
+    return InMemoryElasticSearchTool
+
+#--------------------------------#
+#            Stub LLM            #
+#--------------------------------#
+STUB_ANALYSIS = {
+    "summary": "Revised customer due diligence requirements for regulated entities.",
+    "compliance_types": ["KYC Compliance"],
+    "compliance_types_details": [{"type": "KYC Compliance", "sections": ["1", "2"],
+                                  "description": "Periodic KYC updation and V-CIP requirements."}],
+}
+STUB_COMPARISON = {
+    "Compliant Flag": "Needs immediate action",
+    "comparison updates": [{"category": "Policy Alignment", "rbi_reference": "Circular",
+                            "company_reference": "KYC policy", "key_differences": "Updation period differs."}],
+    "action_items": [{"priority": "High", "recommendation": "Align the KYC updation period."}],
+    "risk mitigations": "Review high-risk accounts first.",
+}
+
+
+def install_stub_llm(latency=0.0):
+    """Replace CrewAI's LLM call with a canned, valid answer after ``latency`` seconds. Returns the call counter."""
+    from crewai import LLM
+    calls = {"count": 0}
+    lock = threading.Lock()
+
+    def call(self, messages, *args, **kwargs):
+        with lock:
+            calls["count"] += 1
+        if latency:
+            time.sleep(latency)
+        prompt = json.dumps(messages) if not isinstance(messages, str) else messages
+        answer = STUB_COMPARISON if "Compare the RBI circular" in prompt else STUB_ANALYSIS
+        return f"Thought: I now know the final answer\nFinal Answer: {json.dumps(answer)}"
+
+    LLM.call = call
+    return calls
@@ -0,0 +1,296 @@
+"""Offline performance suite: listing parsing, PDF extraction, output capture and the end-to-end flow.
+
+Nothing leaves the machine: rbi.org.in is replayed from fixtures (or synthetic pages),
+Elasticsearch is an in-memory stand-in and the LLM is a stub with configurable latency.
+Every scenario runs in its own interpreter so peak RSS is per scenario. Results are
+saved per commit under benchmarks/results/ and can be compared with an earlier run:
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --llm-latency 0.5 --scenarios pipeline
+    python -m benchmarks.suite --compare 0e2b528
+    python -m benchmarks.suite --record-pdfs 10       # needs network, saves PDFs for the listing fixtures
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+SCENARIOS = ("listing_parse", "read_pdf", "output_write", "pipeline", "app")
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def summarise(latencies, elapsed, unit="ops"):
+    """Throughput and latency percentiles for one scenario."""
+    return {"count": len(latencies), "throughput": round(len(latencies) / elapsed, 3) if elapsed else None,
+            "unit": unit, "p50_ms": round(_percentile(latencies, 0.5) * 1000, 3),
+            "p95_ms": round(_percentile(latencies, 0.95) * 1000, 3),
+            "mean_ms": round(statistics.mean(latencies) * 1000, 3) if latencies else 0.0,
+            "elapsed_s": round(elapsed, 3)}
+
+
+def _timed(func, items):
+    latencies = []
+    started = time.perf_counter()
+    for item in items:
+        call_started = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - call_started)
+    return latencies, time.perf_counter() - started
+
+#--------------------------------#
+#            Scenarios           #
+#--------------------------------#
+def bench_listing_parse(args):
+    from benchmarks.standins import FixtureSession
+    from src.components.fetch_rbi_links import parse_month_listing
+    pages = list(FixtureSession().listings.values()) * args.repeat
+    latencies, elapsed = _timed(parse_month_listing, pages)
+    return summarise(latencies, elapsed, unit="pages")
+
+
+def bench_read_pdf(args):
+    from benchmarks.standins import FixtureSession
+    from src.components.fetch_pdf_content import RBINotificationPDFExtractorTool
+    session = FixtureSession()
+    names = [f"https://rbidocs.rbi.org.in/rdocs/notification/PDFs/BENCH{index}.PDF" for index in range(args.pdfs)]
+    pdfs = [session.get(name).content for name in names] * args.repeat
+    extractor = RBINotificationPDFExtractorTool(use_cache=False)
+    latencies, elapsed = _timed(extractor.read_pdf, pdfs)
+    return summarise(latencies, elapsed, unit="pdfs")
+
+
+def bench_output_write(args):
+    from src.utils.output_handler import StreamlitProcessOutput
+
+    class NullContainer:
+        def text(self, body):
+            pass
+
+    output = StreamlitProcessOutput(NullContainer())
+    chunks = [f"\x1b[1m\x1b[95m# Agent:\x1b[00m Compliance Officer working on task {index % 400}\n"
+              f"\x1b[92mThought: reviewing section {index}\x1b[00m\n" for index in range(args.lines)]
+    latencies, elapsed = _timed(output.write, chunks)
+    output.flush()
+    return summarise(latencies, elapsed, unit="writes")
+
+
+def _pipeline_stack(args):
+    """Fixture session, in-memory index, stub LLM and a pipeline wired to them."""
+    from benchmarks import standins
+    from src.components import fetch_rbi_links, pipeline as pipeline_module
+    from src.components.circular_analyzer import CircularService
+    from src.components.duplicate_detector import DuplicateDetector
+    from src.components.fetch_pdf_content import RBINotificationPDFExtractorTool
+
+    session = standins.FixtureSession(latency=args.http_latency)
+    fetch_rbi_links.get_session = pipeline_module.get_session = lambda: session
+    fetch_rbi_links.listing_cache.invalidate()
+    fetch_rbi_links.form_data_cache.invalidate()
+    calls = standins.install_stub_llm(args.llm_latency)
+    elastic = standins.in_memory_elastic(args.es_latency)
+    extractor = RBINotificationPDFExtractorTool(use_cache=False)
+    extractor.session = session
+    eb = elastic(batch_size=args.es_batch)
+    return session, calls, elastic, pipeline_module.CircularPipeline(
+        extractor=extractor, eb=eb, requests_per_minute=0, service=CircularService(),
+        detector=DuplicateDetector(lookup=eb.get_circular))
+
+
+def bench_pipeline(args):
+    from src.components.pipeline import notifications_for_range
+    session, calls, _, pipeline = _pipeline_stack(args)
+    year, month = session.listed_dates()[0]
+    start = datetime(year, month, 1).date()
+    end = datetime(year + month // 12, month % 12 + 1, 1).date() - timedelta(days=1)
+    completions, failures = [], 0
+    started = time.perf_counter()
+    for event in pipeline.run(notifications_for_range(start, end)):
+        if event["event"] == "indexed" and event["ok"]:
+            completions.append(time.perf_counter() - started)
+        elif event["event"] in ("indexed", "failed"):
+            failures += 1
+    elapsed = time.perf_counter() - started
+    # Latency here is time-to-indexed from the start of the run, per circular
+    result = summarise(completions, elapsed, unit="circulars")
+    result.update(failed=failures, llm_calls=calls["count"], http_requests=session.requests)
+    return result
+
+
+def bench_app(args):
+    """End-to-end ``app.main``: pick the fixture date, run the crew, then time the rerun served from the index."""
+    from streamlit.testing.v1 import AppTest
+    from src.components import elasticsearch_oper
+    from src.components.fetch_rbi_links import parse_month_listing
+    from src.components import pipeline as pipeline_module
+    session, calls, elastic, _ = _pipeline_stack(args)
+    # app.py builds its own index writer and PDF extractor, make them the in-memory index and replay session
+    elasticsearch_oper.ElasticSearchTool = elastic
+
+    class ReplayExtractor(pipeline_module.RBINotificationPDFExtractorTool):
+        def __init__(self, *extractor_args, **kwargs):
+            super().__init__(*extractor_args, **kwargs)
+            self.session = session
+
+    pipeline_module.RBINotificationPDFExtractorTool = ReplayExtractor
+    year, month = session.listed_dates()[0]
+    listings = parse_month_listing(session.listings[(year, month)])
+    listed = datetime.strptime(next(iter(listings)), "%b %d, %Y").date()
+
+    app = AppTest.from_file(APP_PATH, default_timeout=args.app_timeout)
+    app.run()
+    app.date_input[0].set_value(listed).run()
+    started = time.perf_counter()
+    app.button[0].click().run()
+    run_seconds = time.perf_counter() - started
+    if app.exception:
+        raise RuntimeError(f"app.main raised: {app.exception[0].value}")
+    reruns = []
+    for _ in range(args.repeat):
+        rerun_started = time.perf_counter()
+        app.run()
+        reruns.append(time.perf_counter() - rerun_started)
+    result = summarise(reruns, sum(reruns), unit="reruns")
+    result.update(first_run_s=round(run_seconds, 3), circulars=len(listings[next(iter(listings))]),
+                  llm_calls=calls["count"])
+    return result
+
+
+BENCHES = {"listing_parse": bench_listing_parse, "read_pdf": bench_read_pdf, "output_write": bench_output_write,
+           "pipeline": bench_pipeline, "app": bench_app}
+
+#--------------------------------#
+#       Runner / Result Store    #
+#--------------------------------#
+def _git(*command):
+    try:
+        return subprocess.run(["git", *command], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def commit_label():
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    return commit + ("-dirty" if _git("status", "--porcelain", "--untracked-files=no") else "")
+
+
+def run_isolated(name, argv):
+    """Run one scenario in a fresh interpreter and return its result dict."""
+    completed = subprocess.run([sys.executable, "-m", "benchmarks.suite", "--child", name, *argv],
+                               capture_output=True, text=True)
+    lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+    if completed.returncode != 0 or not lines:
+        return {"error": (completed.stderr.strip().splitlines() or ["no output"])[-1]}
+    return json.loads(lines[-1])
+
+
+def compare(current, reference_path):
+    with open(reference_path, "r", encoding="utf-8") as file:
+        reference = json.load(file)
+    print(f"\nversus {reference['commit']} ({reference['timestamp']}):")
+    for name, result in current["scenarios"].items():
+        before = reference["scenarios"].get(name)
+        if not before or "error" in before or "error" in result:
+            continue
+        changes = []
+        for key in ("throughput", "p50_ms", "p95_ms", "peak_rss_mb"):
+            if before.get(key) and result.get(key) is not None:
+                changes.append(f"{key} {(result[key] - before[key]) / before[key]:+.1%}")
+        print(f"  {name:<14} {', '.join(changes)}")
+
+
+def record_pdfs(count):
+    """Download up to ``count`` PDFs listed in the recorded listing fixtures (needs network)."""
+    from benchmarks.standins import PDF_FIXTURES_DIR, listing_fixtures
+    from src.components.fetch_rbi_links import get_session, parse_month_listing
+    os.makedirs(PDF_FIXTURES_DIR, exist_ok=True)
+    session, saved = get_session(), 0
+    for path in listing_fixtures():
+        with open(path, "rb") as file:
+            listing = parse_month_listing(file.read()) or {}
+        for notification in (item for items in listing.values() for item in items):
+            if saved >= count:
+                return
+            if not notification.get("pdf_url"):
+                continue
+            response = session.get(notification["pdf_url"])
+            if response.status_code == 200:
+                target = os.path.join(PDF_FIXTURES_DIR, notification["pdf_url"].rsplit("/", 1)[-1])
+                with open(target, "wb") as file:
+                    file.write(response.content)
+                saved += 1
+                print(f"Saved {target} ({len(response.content)} bytes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=[name for name in SCENARIOS if name != "app"],
+                        help="Scenarios to run (app needs streamlit and is opt-in)")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions of the per-item scenarios")
+    parser.add_argument("--pdfs", type=int, default=8, help="Distinct PDFs parsed by read_pdf")
+    parser.add_argument("--lines", type=int, default=20000, help="Writes issued by output_write")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds the stub LLM takes per call")
+    parser.add_argument("--http-latency", type=float, default=0.02, help="Seconds per replayed HTTP request")
+    parser.add_argument("--es-latency", type=float, default=0.005, help="Seconds per in-memory ES request")
+    parser.add_argument("--es-batch", type=int, default=1, help="ElasticSearchTool batch size in the pipeline")
+    parser.add_argument("--app-timeout", type=float, default=600)
+    parser.add_argument("--compare", metavar="COMMIT", help="Compare with benchmarks/results/COMMIT.json")
+    parser.add_argument("--no-save", action="store_true", help="Do not store the results")
+    parser.add_argument("--record-pdfs", type=int, metavar="N", help="Download N PDF fixtures and exit")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.record_pdfs:
+        record_pdfs(args.record_pdfs)
+        return
+    if args.child:
+        from benchmarks.standins import configure_environment
+        configure_environment(tempfile.mkdtemp(prefix="circulars-bench-"))
+        result = BENCHES[args.child](args)
+        result["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+        print(json.dumps(result))
+        return
+
+    child_argv = sys.argv[1:]
+    run = {"commit": commit_label(), "timestamp": datetime.now().isoformat(timespec="seconds"),
+           "python": sys.version.split()[0], "settings": {key: value for key, value in vars(args).items()
+                                                          if key not in ("child", "compare", "no_save")},
+           "scenarios": {}}
+    for name in args.scenarios:
+        result = run_isolated(name, child_argv)
+        run["scenarios"][name] = result
+        if "error" in result:
+            print(f"{name:<14} failed: {result['error']}")
+        else:
+            print(f"{name:<14} {result['throughput']:>10} {result['unit']}/s  p50 {result['p50_ms']:>9}ms  "
+                  f"p95 {result['p95_ms']:>9}ms  peak RSS {result['peak_rss_mb']:>7}MB")
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{run['commit']}.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(run, file, indent=2)
+        print(f"Saved {path}")
+    if args.compare:
+        compare(run, os.path.join(RESULTS_DIR, f"{args.compare}.json"))
+
+
+if __name__ == "__main__":
+    main()
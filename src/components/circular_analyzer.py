@@ -1,41 +1,71 @@
 from typing import Type
 from crewai import Agent, Task, Crew, Process, LLM
 from crewai.tasks import TaskOutput
+from crewai.crews.crew_output import CrewOutput
+from crewai.agents.agent_builder.utilities.base_token_process import TokenProcess
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
+import logging
 import os
-from elasticsearch import Elasticsearch
+import queue
+import re
+import threading
+import time
+from src.utils.analysis_cache import AnalysisCache, cache_key
+from src.utils.metrics import metrics
+from src.utils.chunking import ANALYSIS_CHUNK_TOKENS, estimate_tokens, split_circular
+from src.utils.structured_output import StructuredOutputError, normalise_output
+from src.components.pre_classifier import COMPLIANCE_TYPES, PRECLASSIFIER_ENABLED, PreClassifier, canonical_types
 
 load_dotenv()
 
+# Memoised crew outputs, shared by run_analysis and run_comparison
+analysis_cache = AnalysisCache()
+# Local keyword / TF-IDF tagger used to skip circulars with no tracked compliance type
+pre_classifier = PreClassifier.from_env()
+
+# Batch analysis limits, overridable from the environment
+ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "4"))
+ANALYSIS_REQUESTS_PER_MINUTE = int(os.getenv("ANALYSIS_REQUESTS_PER_MINUTE", "30"))
+ANALYSIS_MAX_RETRIES = int(os.getenv("ANALYSIS_MAX_RETRIES", "2"))
+ANALYSIS_CHUNK_WORKERS = int(os.getenv("ANALYSIS_CHUNK_WORKERS", "4"))
+# Bounds of the summary merged from chunked analyses: chunk summaries kept and total characters
+ANALYSIS_SUMMARY_PARTS = int(os.getenv("ANALYSIS_SUMMARY_PARTS", "3"))
+ANALYSIS_SUMMARY_CHARS = int(os.getenv("ANALYSIS_SUMMARY_CHARS", "1200"))
+
+
 ### AGENT 1
-def create_circular_analyser():
+def create_circular_analyser(llm=None):
     analyser = Agent(
         role='Compliance Officer',
         goal='Analyse RBI circulars and identify all compliance requirements mentioned within the document thoroughly',
         backstory='Expert at analyzing RBI circulars and summarizing complex information and compliance requirements for the company',
         verbose=True,
         allow_delegation=True,  # Disable delegation to avoid caching
+        llm=llm,
     )
     return analyser
 
 ### AGENT 2
-def create_circular_comparator():
+def create_circular_comparator(llm=None):
     comparator = Agent(
         role='Compliance Policies Comparator',
         goal='Compare RBI circular and elasticsearch stored company policy and highlight key differences and recommend next steps',
         backstory='Expert at analyzing RBI circulars and compare with company existing policy for compliance requirements',
         verbose=True,
         # allow_delegation=True,  # Disable delegation to avoid caching
+        llm=llm,
     )
     return comparator
 
 ##### TASK 1
-def create_analysis_task(analyser, context):
+def create_analysis_task(analyser, context="{context}"):
     """Create a research task for the agent to execute.
     
     Args:
         analyser (Agent): The research agent that will perform the task
-        task_description (str): The research query or topic to investigate
+        context (str): The circular to analyse, left as a ``{context}`` kickoff input by default
     
     Returns:
         Task: A configured CrewAI task with expected output format
@@ -71,16 +101,29 @@ def create_analysis_task(analyser, context):
         }'
         Do not give extra reasoning which is not in JSON format.
         """,
-        agent=analyser
+        # No output_pydantic: CrewAI's converter re-asks the LLM for anything that is not strict
+        # JSON, the answer is validated and repaired locally by normalise_output instead
+        agent=analyser,
     )
 
 #### TASK 2
-def create_comparison_task(comparator,context):
+def format_policy_passages(passages):
+    """Render retrieved policy passages as a compact, source-labelled prompt section."""
+    if not passages:
+        return "No company policy passages were found for these compliance types."
+    return "\n\n".join(f"[{passage['source']} #{passage['chunk']}]\n{passage['text']}" for passage in passages)
+
+
+def create_comparison_task(comparator,context="{context}",policy_passages=None):
+    # A string is used verbatim, e.g. a "{policy_passages}" kickoff input
+    if not isinstance(policy_passages, str):
+        policy_passages = format_policy_passages(policy_passages)
     return Task(
-        description=f"""Compare the RBI circular with the stored company policy for the compliance tags identified and
-        highlight all possible regulatory key differences. You retrieve latest RBI circulars from ElasticSearch Index "rbi_kyc_circulars",
-        compare them together and highlight what's been missing into the company's policy with prioritised actionable insights.
+        description=f"""Compare the RBI circular with the company policy passages below for the compliance tags identified and
+        highlight all possible regulatory key differences. The passages are the parts of the company's policies most relevant
+        to this circular's compliance types; compare them together and highlight what's been missing into the company's policy with prioritised actionable insights.
         Recommend next steps for company policy adjustments to updates its policy if required to be compliant and possible risk mitigations
+        Company policy passages: {policy_passages}
         RBI circular: {context}""",
         expected_output="""A comprehensive comparison report for the RBI circular with company exisitng policy.
         Format of the report should be as following:
@@ -116,15 +159,88 @@ def create_comparison_task(comparator,context):
         agent=comparator,
     )
 
+#--------------------------------#
+#          Result Cache          #
+#--------------------------------#
+def _agent_model(agent):
+    llm = getattr(agent, "llm", None)
+    return getattr(llm, "model", None) or str(llm)
+
+
+def _run_cached(kind, agent, task, crew, cache_text, force_refresh, inputs=None, prompt=None):
+    """Kick off ``crew`` unless an output for the same text, prompt and model is already cached.
+
+    ``prompt`` is the task description without ``cache_text``, derived from ``task`` when not given.
+    The answer is validated against the ``kind`` report schema and ``result.raw`` replaced by the
+    clean JSON; an answer that cannot be parsed raises :class:`StructuredOutputError` and is not cached.
+    """
+    if cache_text is None:
+        return _validated(kind, _kickoff(kind, agent, crew, inputs))
+    if prompt is None:
+        prompt = task.description.replace(cache_text, "")
+    key = cache_key(cache_text, kind, prompt, task.expected_output, _agent_model(agent))
+    if not force_refresh:
+        raw = analysis_cache.get(key)
+        if raw is not None:
+            try:
+                output = CrewOutput(raw=normalise_output(kind, raw))
+                metrics.incr("analysis_cache_total", kind=kind, result="hit")
+                return output
+            except StructuredOutputError:
+                logging.warning(f"Ignoring unparseable cached {kind} output")
+        metrics.incr("analysis_cache_total", kind=kind, result="miss")
+    result = _validated(kind, _kickoff(kind, agent, crew, inputs))
+    analysis_cache.set(key, kind, result.raw)
+    return result
+
+
+def _reset_usage(crew):
+    """Give the crew's agents a fresh token counter for the next kickoff.
+
+    CrewAI feeds an agent's ``TokenProcess`` from the usage of each LLM response, through the
+    callback list passed to that very call; ``LLM.call`` also assigns the process-global
+    ``litellm.callbacks``, but the token handler ignores what litellm reports through it. The
+    counter a kickoff's executor is built with therefore only sees that kickoff's own calls,
+    even while other crews sharing the LLM run in other threads, and a reused crew does not
+    carry over the tokens of its earlier kickoffs.
+    """
+    for agent in crew.agents:
+        if hasattr(agent, "_token_process"):
+            agent._token_process = TokenProcess()
+
+
+def _kickoff(kind, agent, crew, inputs):
+    """Run the crew inside an ``llm_<kind>`` span, counting the prompt/completion tokens of this kickoff."""
+    with metrics.span(f"llm_{kind}", model=_agent_model(agent)) as span:
+        _reset_usage(crew)
+        result = crew.kickoff(inputs=inputs)
+        usage = getattr(result, "token_usage", None)
+        span["prompt_tokens"] = getattr(usage, "prompt_tokens", 0)
+        span["completion_tokens"] = getattr(usage, "completion_tokens", 0)
+    metrics.record_llm_usage(kind, usage)
+    return result
+
+
+def _validated(kind, result):
+    try:
+        result.raw = normalise_output(kind, result)
+    except StructuredOutputError:
+        logging.error(f"Unparseable {kind} output: {result.raw[:500]!r}")
+        metrics.incr("llm_unparseable_total", kind=kind)
+        raise
+    return result
+
 #--------------------------------#
 #         Analyser Crew          #
 #--------------------------------#
-def run_analysis(analyser, task):
+def run_analysis(analyser, task, cache_text=None, force_refresh=False):
     """Execute the research task using the configured agent.
     
     Args:
         analyser (Agent): The research agent to perform the task
         task (Task): The research task to execute
+        cache_text (str): Text the result is memoised on (the task context), None disables caching
+        force_refresh (bool): Ignore any cached result and re-run the crew
     
     Returns:
         str: The research results in markdown format
@@ -136,17 +252,19 @@ def run_analysis(analyser, task):
         process=Process.sequential
     )
 
-    return crew.kickoff()
+    return _run_cached("analysis", analyser, task, crew, cache_text, force_refresh)
 
 #--------------------------------#
 #         Comparator Crew          #
 #--------------------------------#
-def run_comparison(comparator, task):
+def run_comparison(comparator, task, cache_text=None, force_refresh=False):
     """Execute the research task using the configured agent.
     
     Args:
         analyser (Agent): The research agent to perform the task
         task (Task): The research task to execute
+        cache_text (str): Text the result is memoised on (the task context), None disables caching
+        force_refresh (bool): Ignore any cached result and re-run the crew
     
     Returns:
         str: The research results in markdown format
@@ -158,4 +276,304 @@ def run_comparison(comparator, task):
         process=Process.sequential
     )
 
-    return crew.kickoff()
\ No newline at end of file
+    return _run_cached("comparison", comparator, task, crew, cache_text, force_refresh)
+
+#--------------------------------#
+#      Reusable Crew Service     #
+#--------------------------------#
+class CircularService:
+    """Pre-built analyser and comparator crews, reused across circulars.
+
+    Building an ``Agent``/``Task``/``Crew`` re-initialises the LLM client, tools and prompts,
+    so the service builds each crew once with its task left as a template (``{context}``,
+    ``{policy_passages}``) and fills it in through kickoff inputs on every call. A crew
+    keeps per-run state, so up to ``workers`` crews of each kind are built on demand and
+    checked out by one call at a time; all of them share a single LLM.
+    """
+
+    def __init__(self, workers: int = ANALYSIS_MAX_WORKERS, llm=None):
+        """
+        Args:
+            workers (int): Crews of each kind, i.e. how many calls of a kind run at the same time
+            llm (LLM): Shared LLM, defaults to the one CrewAI configures for the first agent
+        """
+        self.workers = max(1, workers)
+        self.llm = llm
+        self._idle = {"analysis": queue.Queue(), "comparison": queue.Queue()}
+        self._built = {"analysis": 0, "comparison": 0}
+        self._lock = threading.Lock()
+
+    def _build(self, kind):
+        if kind == "analysis":
+            agent = create_circular_analyser(self.llm)
+            task = create_analysis_task(agent)
+        else:
+            agent = create_circular_comparator(self.llm)
+            task = create_comparison_task(agent, policy_passages="{policy_passages}")
+        with self._lock:
+            self.llm = self.llm or agent.llm
+        crew = Crew(agents=[agent], tasks=[task], verbose=True, process=Process.sequential)
+        # Kickoff interpolates the task in place, keep the template for cache keys
+        return {"agent": agent, "task": task, "crew": crew, "template": task.description}
+
+    def _checkout(self, kind):
+        idle = self._idle[kind]
+        try:
+            return idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            build = self._built[kind] < self.workers
+            if build:
+                self._built[kind] += 1
+        return self._build(kind) if build else idle.get()
+
+    def _run(self, kind, inputs, cache_text, force_refresh):
+        crew = self._checkout(kind)
+        try:
+            prompt = crew["template"]
+            for name, value in inputs.items():
+                prompt = prompt.replace(f"{{{name}}}", "" if value == cache_text else value)
+            return _run_cached(kind, crew["agent"], crew["task"], crew["crew"], cache_text, force_refresh,
+                               inputs=inputs, prompt=prompt)
+        finally:
+            self._idle[kind].put(crew)
+
+    def analyse(self, context, force_refresh=False):
+        """Analyse one circular context (see :func:`_analysis_context`) through the result cache."""
+        return self._run("analysis", {"context": context}, context, force_refresh)
+
+    def compare(self, context, policy_passages=None, force_refresh=False):
+        """Compare one analysed circular (JSON) with the retrieved policy passages."""
+        inputs = {"context": context, "policy_passages": format_policy_passages(policy_passages)}
+        return self._run("comparison", inputs, context, force_refresh)
+
+    def analyse_stream(self, circulars, **options):
+        """Analyse a stream of circular dicts with this service, see :func:`run_analysis_batch`."""
+        yield from run_analysis_batch(circulars, max_workers=self.workers, service=self, **options)
+
+
+_circular_service = None
+_circular_service_lock = threading.Lock()
+
+
+def get_circular_service():
+    """Process-wide :class:`CircularService`."""
+    global _circular_service
+    with _circular_service_lock:
+        if _circular_service is None:
+            _circular_service = CircularService()
+        return _circular_service
+
+#--------------------------------#
+#      Batch Analyser Crews      #
+#--------------------------------#
+class RateLimiter:
+    """Space out crew kickoffs so that at most ``per_minute`` start every minute."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _analysis_context(circular_dict, text, part=None):
+    """Only what the analyser needs: the name, date and text, without URLs and file names."""
+    context = {"name": circular_dict.get("name"), "circular_date": circular_dict.get("circular_date")}
+    if part:
+        context["part"] = part
+    context["circular_text"] = text
+    return json.dumps(context)
+
+
+def _analyse_text(context, force_refresh, limiter, service=None):
+    if limiter is not None:
+        limiter.wait()
+    return (service or get_circular_service()).analyse(context, force_refresh=force_refresh)
+
+
+def _section_key(section):
+    """Natural ordering for section numbers, so "2.10" sorts after "2.9"."""
+    return [(0, int(part)) if part.isdigit() else (1, part) for part in re.split(r'(\d+)', str(section)) if part]
+
+
+def _type_rank(compliance_type):
+    lowered = compliance_type.lower()
+    categories = canonical_types([compliance_type])
+    if categories:
+        return list(COMPLIANCE_TYPES).index(categories[0]), lowered
+    return len(COMPLIANCE_TYPES), lowered
+
+
+def _shorten(text, limit):
+    """Cut ``text`` to at most ``limit`` characters at a word boundary."""
+    if len(text) <= limit:
+        return text
+    return text[:max(limit - 1, 0)].rsplit(" ", 1)[0].rstrip(" ,;:") + "…"
+
+
+def merge_chunk_analyses(analyses):
+    """Deterministically merge per-chunk analysis reports into one report for the circular.
+
+    Details are grouped by canonical compliance type (so "KYC Compliance" and "Know Your
+    Customer" become one entry named after the category), section lists are unioned and
+    naturally sorted, descriptions keep chunk order, and types follow the prompt's category
+    order. The summary joins the first ANALYSIS_SUMMARY_PARTS distinct chunk summaries,
+    each shortened to an equal share of ANALYSIS_SUMMARY_CHARS.
+    """
+    merged = {}
+    summaries = []
+    for analysis in analyses:
+        summary = (analysis.get("summary") or "").strip()
+        if summary and summary not in summaries:
+            summaries.append(summary)
+        for detail in analysis.get("compliance_types_details") or []:
+            compliance_type = (detail.get("type") or "").strip()
+            if not compliance_type:
+                continue
+            categories = canonical_types([compliance_type])
+            name = categories[0] if categories else compliance_type
+            entry = merged.setdefault(name.lower(), {"type": name, "sections": set(), "descriptions": []})
+            entry["sections"].update(str(section) for section in detail.get("sections") or [])
+            description = (detail.get("description") or "").strip()
+            if description and description not in entry["descriptions"]:
+                entry["descriptions"].append(description)
+
+    details = [
+        {"type": entry["type"],
+         "sections": sorted(entry["sections"], key=_section_key),
+         "description": " ".join(entry["descriptions"])}
+        for entry in sorted(merged.values(), key=lambda entry: _type_rank(entry["type"]))
+    ]
+    summaries = summaries[:ANALYSIS_SUMMARY_PARTS]
+    share = ANALYSIS_SUMMARY_CHARS // max(len(summaries), 1)
+    return {
+        "summary": " ".join(_shorten(summary, share) for summary in summaries),
+        "compliance_types": [detail["type"] for detail in details],
+        "compliance_types_details": details,
+    }
+
+
+def skipped_analysis(tags=()):
+    """Analysis fields for a circular the pre-classifier ruled out, so it can still be indexed."""
+    return {"summary": "", "compliance_types": list(tags), "compliance_types_details": [],
+            "analysis_skipped": True}
+
+
+def _analyse_amendment(circular_dict, amendment, force_refresh, limiter, max_tokens, prefilter, service):
+    """Reuse an earlier circular's analysis, running the crew only over the sections that changed."""
+    prior = amendment["prior"]
+    changed = amendment.get("changed_sections") or []
+    if not changed:
+        logging.info(f"Reusing the analysis of {amendment['doc_id']} for unchanged {circular_dict.get('name')}")
+        return CrewOutput(raw=json.dumps(dict(prior, analysis_reused_from=amendment["doc_id"])))
+    logging.info(f"Analysing {len(changed)} amended sections of {circular_dict.get('name')}")
+    delta_circular = dict(circular_dict, circular_text="\n\n".join(changed))
+    delta = json.loads(analyse_circular(delta_circular, force_refresh, limiter, max_tokens, prefilter, service).raw)
+    if delta.get("analysis_skipped"):
+        # The amendments touch no tracked compliance type
+        merged = dict(prior)
+    else:
+        if delta.get("summary"):
+            delta["summary"] = f"Amended sections: {delta['summary']}"
+        merged = merge_chunk_analyses([prior, delta])
+    return CrewOutput(raw=json.dumps(dict(merged, analysis_reused_from=amendment["doc_id"])))
+
+
+class EmptyCircularError(ValueError):
+    """A circular without extracted text, which must fail rather than be indexed as skipped."""
+
+
+def analyse_circular(circular_dict, force_refresh=False, limiter=None, max_tokens=ANALYSIS_CHUNK_TOKENS,
+                     prefilter=PRECLASSIFIER_ENABLED, service=None, amendment=None):
+    """Analyse a single circular through the result cache.
+
+    With ``prefilter`` set, the pre-classifier tags are stored on ``circular_dict`` under
+    ``pre_classifier_tags`` and circulars matching no tracked compliance type skip the crew.
+    Circulars whose text fits in ``max_tokens`` go through one crew. Longer ones are split on
+    section and paragraph boundaries, each chunk is analysed concurrently and the chunk
+    reports are merged with :func:`merge_chunk_analyses`. Crews come from ``service``,
+    the process-wide :class:`CircularService` by default.
+
+    ``amendment`` (from :meth:`DuplicateDetector.inspect`) marks a re-issue of an analysed
+    circular: its analysis is reused and only the changed sections are sent to the crew.
+    """
+    text = circular_dict.get("circular_text") or ""
+    if not text.strip():
+        raise EmptyCircularError(f"No text was extracted from {circular_dict.get('name')}")
+    if prefilter:
+        tags = pre_classifier.tag(text)
+        circular_dict["pre_classifier_tags"] = tags
+        if not tags:
+            logging.info(f"Skipping analysis of {circular_dict.get('name')}: no tracked compliance type found")
+            return CrewOutput(raw=json.dumps(skipped_analysis()))
+
+    if amendment is not None:
+        return _analyse_amendment(circular_dict, amendment, force_refresh, limiter, max_tokens, prefilter, service)
+
+    if estimate_tokens(text) <= max_tokens:
+        return _analyse_text(_analysis_context(circular_dict, text), force_refresh, limiter, service)
+
+    chunks = split_circular(text, max_tokens)
+    logging.info(f"Analysing {circular_dict.get('name')} in {len(chunks)} chunks")
+    contexts = [_analysis_context(circular_dict, chunk, part=f"{index} of {len(chunks)}")
+                for index, chunk in enumerate(chunks, start=1)]
+    with ThreadPoolExecutor(max_workers=max(1, min(ANALYSIS_CHUNK_WORKERS, len(contexts)))) as pool:
+        results = list(pool.map(lambda context: _analyse_text(context, force_refresh, limiter, service), contexts))
+    merged = merge_chunk_analyses(json.loads(result.raw) for result in results)
+    return CrewOutput(raw=json.dumps(merged))
+
+
+def analyse_with_retries(circular_dict, limiter=None, max_retries=ANALYSIS_MAX_RETRIES, backoff_seconds=2.0,
+                         force_refresh=False, service=None, amendment=None):
+    """Run :func:`analyse_circular`, retrying failures with exponential backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            return analyse_circular(circular_dict, force_refresh=force_refresh, limiter=limiter, service=service,
+                                    amendment=amendment)
+        except Exception as e:
+            if attempt == max_retries or isinstance(e, EmptyCircularError):
+                raise
+            # A garbled answer is retried straight away, only API errors back off
+            delay = 0 if isinstance(e, StructuredOutputError) else backoff_seconds * 2 ** attempt
+            logging.warning(f"Analysis of {circular_dict.get('name')} failed ({e}), retrying in {delay}s")
+            time.sleep(delay)
+
+
+def run_analysis_batch(circulars, max_workers=ANALYSIS_MAX_WORKERS,
+                       requests_per_minute=ANALYSIS_REQUESTS_PER_MINUTE,
+                       max_retries=ANALYSIS_MAX_RETRIES, backoff_seconds=2.0,
+                       force_refresh=False, initializer=None, service=None):
+    """Analyse several circulars concurrently, yielding each one as soon as it finishes.
+
+    Args:
+        circulars (list): Circular dicts as produced by RBINotificationPDFExtractorTool
+        max_workers (int): Number of crews running at the same time
+        requests_per_minute (int): Upper bound on crew kickoffs per minute, 0 disables the limit
+        max_retries (int): Retries per circular, with exponential backoff starting at ``backoff_seconds``
+        force_refresh (bool): Ignore cached analyses
+        initializer (callable): Run in every worker thread before it starts, e.g. to attach UI context
+        service (CircularService): Crews to reuse, the process-wide service by default
+
+    Yields:
+        tuple: ``(index, result, error)`` where exactly one of ``result``/``error`` is set
+    """
+    limiter = RateLimiter(requests_per_minute)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), initializer=initializer) as pool:
+        futures = {pool.submit(analyse_with_retries, circular_dict, limiter, max_retries, backoff_seconds,
+                               force_refresh, service): index
+                   for index, circular_dict in enumerate(circulars)}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
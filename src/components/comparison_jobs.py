@@ -0,0 +1,72 @@
+import json
+import threading
+from src.components.policy_store import get_policy_store
+from src.utils.analysis_cache import cache_key
+from src.utils.job_queue import JOB_WORKERS, JobQueue
+
+#--------------------------------#
+#   Background Policy Compares   #
+#--------------------------------#
+def comparison_context(record):
+    """Stable serialisation of an analysed circular, so fresh and stored records share one comparison."""
+    return json.dumps(record, sort_keys=True)
+
+
+def run_comparison_job(payload):
+    """Job handler: retrieve the policy passages for the record and run the comparator crew."""
+    # Imported here so the job queue can be created without loading CrewAI
+    from src.components.circular_analyzer import get_circular_service
+    record = json.loads(payload["context"])
+    passages = get_policy_store().retrieve(record)
+    result = get_circular_service().compare(payload["context"], passages,
+                                            force_refresh=payload.get("force_refresh", False))
+    return result.raw
+
+
+class ComparisonJobs:
+    """Circular-vs-policy comparisons precomputed in the background.
+
+    Each comparison is a job keyed by the record and the policy store version, so the
+    same circular is compared once however often it is selected or submitted, and
+    changing a policy file queues fresh comparisons.
+    """
+
+    def __init__(self, jobs: JobQueue = None, workers: int = JOB_WORKERS):
+        self.jobs = jobs or JobQueue({"comparison": run_comparison_job}, workers=workers)
+
+    def job_key(self, record):
+        return cache_key(comparison_context(record), "comparison", get_policy_store().version)
+
+    def submit(self, record, force_refresh=False):
+        """Queue the comparison for an analysed circular and return its job key."""
+        key = self.job_key(record)
+        self.jobs.submit("comparison", key, {"context": comparison_context(record), "force_refresh": force_refresh},
+                         force=force_refresh)
+        return key
+
+    def submit_all(self, records, force_refresh=False):
+        """Speculatively queue comparisons for every analysed circular, e.g. a whole day's listing."""
+        return [self.submit(record, force_refresh) for record in records]
+
+    def status(self, record):
+        """Job state for ``record``: ``{"status", "result", "error", ...}``, with ``result`` parsed, or None."""
+        job = self.jobs.status(self.job_key(record))
+        if job and job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+    def retry(self, record):
+        return self.jobs.retry(self.job_key(record))
+
+
+_comparison_jobs = None
+_comparison_jobs_lock = threading.Lock()
+
+
+def get_comparison_jobs():
+    """Process-wide :class:`ComparisonJobs`, starting its workers on first use."""
+    global _comparison_jobs
+    with _comparison_jobs_lock:
+        if _comparison_jobs is None:
+            _comparison_jobs = ComparisonJobs()
+        return _comparison_jobs
@@ -0,0 +1,117 @@
+import hashlib
+import logging
+import threading
+from src.utils.metrics import metrics
+from src.utils.similarity_index import SimilarityIndex, content_hash
+
+#--------------------------------#
+#  Duplicate/Amendment Detection #
+#--------------------------------#
+ANALYSIS_FIELDS = ("summary", "compliance_types", "compliance_types_details")
+
+
+def disambiguated_id(doc_id, pdf_url):
+    """Id for a circular whose file name is already taken by a different PDF URL."""
+    return f"{doc_id}-{hashlib.sha1(pdf_url.encode('utf-8')).hexdigest()[:8]}"
+
+
+class DuplicateDetector:
+    """Flags re-issued and amended circulars at ingest, before they reach the analyser.
+
+    ``inspect`` gives colliding file names a unique document id, annotates the circular
+    with ``content_hash`` and, when it matches an indexed circular, ``duplicate_of``,
+    ``duplicate_kind`` ("exact" or "near"), ``similarity`` and ``amended_sections``. It
+    returns the amendment the analyser needs to reuse the earlier analysis. ``add``
+    records a circular once it is indexed.
+    """
+
+    def __init__(self, index: SimilarityIndex = None, lookup=None):
+        """
+        Args:
+            index (SimilarityIndex): MinHash/LSH index, loaded from SIMILARITY_INDEX_PATH by default
+            lookup (callable): ``doc_id -> stored circular or None``, e.g. ``ElasticSearchTool.get_circular``
+        """
+        self.index = index or SimilarityIndex()
+        self.lookup = lookup
+        self._ids_lock = threading.Lock()
+        # Ids handed out by this detector that are not indexed yet, so one batch cannot collide with itself
+        self._claimed = {}
+
+    def _stored(self, doc_id):
+        if self.lookup is None:
+            return None
+        return self.lookup(doc_id, include_text=False)
+
+    def assign_id(self, circular):
+        """Keep ``downloaded_url`` (the document id) unless another PDF URL already uses it."""
+        doc_id, pdf_url = circular.get("downloaded_url"), circular.get("pdf_url")
+        if not doc_id or not pdf_url:
+            return doc_id
+        with self._ids_lock:
+            owner = self._claimed.get(doc_id) or self.index.url_for(doc_id)
+            if owner is None:
+                stored = self._stored(doc_id)
+                owner = stored.get("pdf_url") if stored else None
+            if owner and owner != pdf_url:
+                logging.warning(f"File name {doc_id} is already used by {owner}, storing {pdf_url} separately")
+                metrics.incr("duplicate_detector_total", result="id_collision")
+                doc_id = disambiguated_id(doc_id, pdf_url)
+            self._claimed.setdefault(doc_id, pdf_url)
+        circular["downloaded_url"] = doc_id
+        return doc_id
+
+    def inspect(self, circular, reuse=True):
+        """Annotate ``circular`` and return ``{"doc_id", "prior", "changed_sections"}`` when its analysis can be reused.
+
+        Args:
+            circular (dict): Extracted circular, ``downloaded_url`` may be rewritten on an id collision
+            reuse (bool): Set to False (e.g. on a forced refresh) to flag duplicates without reusing analyses
+        """
+        self.assign_id(circular)
+        text = circular.get("circular_text") or ""
+        circular["content_hash"] = content_hash(text)
+        if not text.strip():
+            return None
+        # A re-ingested circular must not match its own earlier copy
+        match = self.index.match(text, exclude=circular["downloaded_url"])
+        if match is None:
+            metrics.incr("duplicate_detector_total", result="new")
+            return None
+        metrics.incr("duplicate_detector_total", result=match["kind"])
+        circular.update(duplicate_of=match["doc_id"], duplicate_kind=match["kind"], similarity=match["similarity"],
+                        amended_sections=len(match["changed_sections"]))
+        logging.info(f"{circular.get('name')} is a {match['kind']} duplicate of {match['doc_id']} "
+                     f"({match['similarity']:.0%} similar, {len(match['changed_sections'])} sections changed)")
+        if not reuse:
+            return None
+        prior = self._stored(match["doc_id"])
+        if not prior or prior.get("analysis_skipped") or not all(field in prior for field in ANALYSIS_FIELDS):
+            return None
+        return {"doc_id": match["doc_id"], "prior": {field: prior[field] for field in ANALYSIS_FIELDS},
+                "changed_sections": match["changed_sections"]}
+
+    def add(self, circular):
+        """Index an ingested circular so later ones can be matched against it."""
+        text = circular.get("circular_text")
+        if text:
+            self.index.add(circular["downloaded_url"], circular.get("pdf_url"), text)
+        with self._ids_lock:
+            self._claimed.pop(circular["downloaded_url"], None)
+
+    def save(self):
+        self.index.save()
+
+
+_duplicate_detector = None
+_duplicate_detector_lock = threading.Lock()
+
+
+def get_duplicate_detector(lookup=None):
+    """Process-wide :class:`DuplicateDetector` sharing one loaded index."""
+    global _duplicate_detector
+    with _duplicate_detector_lock:
+        if _duplicate_detector is None:
+            _duplicate_detector = DuplicateDetector(lookup=lookup)
+        elif lookup is not None and _duplicate_detector.lookup is None:
+            _duplicate_detector.lookup = lookup
+        return _duplicate_detector
@@ -1,8 +1,14 @@
-from elasticsearch import Elasticsearch
-from crewai.tasks import TaskOutput
 from typing import List, Type, Dict
 from dotenv import load_dotenv
+import base64
+import hashlib
+import json
+import logging
 import os
+import threading
+import zlib
+from src.utils.metrics import metrics
+from src.utils.ttl_cache import TTLCache
 
 load_dotenv()
 # ✅ Elasticsearch Client Setup
@@ -11,27 +17,417 @@ espassword=os.getenv("espassword")
 eshost=os.getenv("eshost")
 esport=os.getenv("esport")
 
-client = Elasticsearch(
-    f"https://{esuser}:{espassword}@{eshost}:{esport}",
-    verify_certs=False,
-    request_timeout=120
-)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Build the Elasticsearch client on first use, so importing this module costs no network or heavy imports."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from elasticsearch import Elasticsearch
+            _client = Elasticsearch(
+                f"https://{esuser}:{espassword}@{eshost}:{esport}",
+                verify_certs=False,
+                request_timeout=120
+            )
+        return _client
+
 # ✅ Define the index name
 INDEX_NAME = "test_hackathon_rbi_datewise_docs"
 
+# ✅ Bulk indexing settings
+ES_BATCH_SIZE = int(os.getenv("ES_BATCH_SIZE", "100"))
+ES_REFRESH = os.getenv("ES_REFRESH", "false")  # "false", "true" or "wait_for"
+ES_MAX_RETRIES = int(os.getenv("ES_MAX_RETRIES", "3"))
+
+# ✅ Explicit mapping for the compact analysis records. New records keep only a text_hash
+# pointing into the text index below; circular_text is still mapped for records stored
+# with the text inline before the split.
+INDEX_MAPPING = {
+    "dynamic": True,
+    "properties": {
+        "name": {"type": "text", "fields": {"keyword": {"type": "keyword", "ignore_above": 512}}},
+        "pdf_url": {"type": "keyword"},
+        "notification_url": {"type": "keyword"},
+        "downloaded_url": {"type": "keyword"},
+        "circular_date": {"type": "keyword"},
+        "circular_text": {"type": "text", "norms": False, "index_options": "freqs"},
+        "summary": {"type": "text"},
+        "compliance_types": {"type": "keyword"},
+        "pre_classifier_tags": {"type": "keyword"},
+        "analysis_skipped": {"type": "boolean"},
+        "content_hash": {"type": "keyword"},
+        "duplicate_of": {"type": "keyword"},
+        "duplicate_kind": {"type": "keyword"},
+        "similarity": {"type": "float"},
+        "amended_sections": {"type": "integer"},
+        "analysis_reused_from": {"type": "keyword"},
+        "analysed": {"type": "boolean"},
+        "text_hash": {"type": "keyword"},
+        "compliance_types_details": {
+            "properties": {
+                "type": {"type": "keyword"},
+                "sections": {"type": "keyword"},
+                "description": {"type": "text"},
+            }
+        },
+    },
+}
+
+# ✅ Read path settings: heavy fields left out of search hits unless asked for, a tie-breaking
+# keyword sort for search_after paging, and a small in-process result cache
+HEAVY_FIELDS = ["circular_text"]
+SORT_FIELD = "downloaded_url"
+ES_QUERY_CACHE_TTL_SECONDS = int(os.getenv("ES_QUERY_CACHE_TTL_SECONDS", "60"))
+query_cache = TTLCache(ES_QUERY_CACHE_TTL_SECONDS)
+
+# ✅ Full circular texts live in their own index, keyed by the SHA-256 of the text so identical
+# texts are stored once. Only a zlib-compressed copy is kept in _source; the plain text is
+# indexed for full-text search but never stored or returned.
+TEXT_INDEX_NAME = os.getenv("ES_TEXT_INDEX", INDEX_NAME + "_texts")
+TEXT_COMPRESSION_LEVEL = int(os.getenv("TEXT_COMPRESSION_LEVEL", "6"))
+TEXT_MATCH_LIMIT = int(os.getenv("ES_TEXT_MATCH_LIMIT", "1000"))
+ES_TEXT_CACHE_TTL_SECONDS = int(os.getenv("ES_TEXT_CACHE_TTL_SECONDS", "600"))
+TEXT_INDEX_MAPPING = {
+    "dynamic": False,
+    "_source": {"excludes": ["text"]},
+    "properties": {
+        "text": {"type": "text", "norms": False, "index_options": "freqs"},
+        "compressed": {"type": "binary"},
+        "length": {"type": "integer"},
+    },
+}
+# Texts are large, so only the few most recently opened ones are kept in memory
+text_cache = TTLCache(ES_TEXT_CACHE_TTL_SECONDS, max_entries=32)
+
+
+def is_analysed(record):
+    """Whether the crew (or the pre-classifier) ran on a stored circular, False for ``--skip-analysis`` records."""
+    # Records stored before the flag existed are analysed when they carry compliance types
+    return record.get("analysed", "compliance_types" in record)
+
+
+def text_hash(text):
+    """SHA-256 of the exact circular text, its id in the text index."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compress_text(text):
+    return base64.b64encode(zlib.compress(text.encode("utf-8"), TEXT_COMPRESSION_LEVEL)).decode("ascii")
+
+
+def decompress_text(data):
+    return zlib.decompress(base64.b64decode(data)).decode("utf-8")
+
+
+def split_document(document):
+    """Split a circular into its compact analysis record and its text index entry.
+
+    ``text_hash`` is also set on ``document`` itself, so callers holding the full document
+    end up with the same fields as the record read back from the index.
+
+    Returns:
+        tuple: (record without the heavy fields, ``{"text", "compressed", "length"}`` or None)
+    """
+    text = document.get("circular_text")
+    if text:
+        document["text_hash"] = text_hash(text)
+    record = {key: value for key, value in document.items() if key not in HEAVY_FIELDS}
+    if not text:
+        return record, None
+    return record, {"text": text, "compressed": compress_text(text), "length": len(text)}
+
+
+_index_ready = False
+_index_lock = threading.Lock()
+
+
+def ensure_index():
+    """Create the record and text indices with their mappings on first use; safe to call repeatedly."""
+    global _index_ready
+    if _index_ready:
+        return
+    with _index_lock:
+        if not _index_ready:
+            client = get_client()
+            for index, mappings in ((INDEX_NAME, INDEX_MAPPING), (TEXT_INDEX_NAME, TEXT_INDEX_MAPPING)):
+                if not client.indices.exists(index=index):
+                    client.indices.create(index=index, mappings=mappings, ignore=400)
+            _index_ready = True
+
+
 class ElasticSearchTool:
     name: str = "Elastic Search operations"
     description: str = "Store and retrieve operations in elastic search"
-    client.indices.create(
-    index=INDEX_NAME,
-    ignore=400,  # Ignore if index already exists
-    )
+
+    def __init__(self, batch_size: int = ES_BATCH_SIZE, refresh: str = ES_REFRESH, max_retries: int = ES_MAX_RETRIES):
+        """
+        Args:
+            batch_size (int): Documents buffered by ``add`` before they are flushed in one bulk request
+            refresh (str): Elasticsearch refresh policy applied to bulk requests
+            max_retries (int): Retries for documents rejected with 429 (too many requests)
+        """
+        self.batch_size = batch_size
+        self.refresh = refresh
+        self.max_retries = max_retries
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def add(self, output):
+        """Buffer a circular document, flushing once ``batch_size`` documents are queued."""
+        with self._buffer_lock:
+            self._buffer.append(output)
+            if len(self._buffer) < self.batch_size:
+                return []
+            documents, self._buffer = self._buffer, []
+        return self.bulk_store(documents)
+
+    def flush(self):
+        """Send all buffered documents and return per-document ``(id, ok, error)`` results."""
+        with self._buffer_lock:
+            documents, self._buffer = self._buffer, []
+        return self.bulk_store(documents)
+
+    def bulk_store(self, documents):
+        """Index ``documents`` with the streaming bulk helper.
+
+        Each document is written as a compact record to the main index, and its
+        ``circular_text`` compressed to the text index unless that text is already stored.
+
+        Returns:
+            list: one ``(document id, ok, error)`` tuple per document
+        """
+        if not documents:
+            return []
+        records, texts = [], {}
+        for document in documents:
+            record, entry = split_document(document)
+            records.append(record)
+            if entry:
+                texts[record["text_hash"]] = entry
+        metrics.incr("es_text_bytes_total", sum(entry["length"] for entry in texts.values()), form="raw")
+        metrics.incr("es_text_bytes_total", sum(len(entry["compressed"]) for entry in texts.values()),
+                     form="compressed")
+        # Texts go first, so a record is never searchable before the text it points to
+        actions = [{"_op_type": "create", "_index": TEXT_INDEX_NAME, "_id": key, "_source": entry}
+                   for key, entry in texts.items()]
+        actions += [{"_index": INDEX_NAME, "_id": record["downloaded_url"], "_source": record} for record in records]
+        hashes = {record["downloaded_url"]: record.get("text_hash") for record in records}
+        results, text_errors = [], {}
+        try:
+            # An unreachable cluster fails here too, and is reported per document below
+            from elasticsearch import helpers
+            ensure_index()
+            with metrics.span("es_bulk", documents=len(documents), texts=len(texts)):
+                for ok, item in helpers.streaming_bulk(
+                        get_client(), actions, chunk_size=self.batch_size, max_retries=self.max_retries,
+                        raise_on_error=False, raise_on_exception=False, refresh=self.refresh):
+                    info = next(iter(item.values()))
+                    if info.get("_index") == TEXT_INDEX_NAME:
+                        # 409: the same text was stored before
+                        if not ok and info.get("status") != 409:
+                            text_errors[info.get("_id")] = info.get("error")
+                        continue
+                    error = None if ok else info.get("error")
+                    stored_hash = hashes.get(info.get("_id"))
+                    if ok and stored_hash in text_errors:
+                        ok, error = False, f"circular text not stored: {text_errors[stored_hash]}"
+                    results.append((info.get("_id"), ok, error))
+        except Exception as e:
+            logging.error(f"Bulk indexing into Elastic failed: {e}")
+            indexed = {doc_id for doc_id, _, _ in results}
+            results.extend((record["downloaded_url"], False, str(e))
+                           for record in records if record["downloaded_url"] not in indexed)
+        # Cached query results may now be stale
+        query_cache.invalidate()
+        failed = [result for result in results if not result[1]]
+        metrics.incr("es_documents_total", len(results) - len(failed), result="indexed")
+        metrics.incr("es_documents_total", len(failed), result="failed")
+        for doc_id, _, error in failed:
+            logging.error(f"Error while storing {doc_id} in Elastic: {error}")
+        print(f"Indexed {len(results) - len(failed)} of {len(documents)} documents in Elastic")
+        return results
+
+    def split_inline_texts(self, page_size=50):
+        """Move ``circular_text`` of records indexed before the text split into the text index.
+
+        Returns:
+            int: number of records rewritten as compact records
+        """
+        ensure_index()
+        moved = 0
+        while True:
+            response = get_client().search(index=INDEX_NAME, query={"exists": {"field": "circular_text"}},
+                                           size=page_size)
+            documents = [hit["_source"] for hit in response["hits"]["hits"]]
+            if not documents:
+                return moved
+            indexed = sum(1 for _, ok, _ in self.bulk_store(documents) if ok)
+            if not indexed:
+                logging.error("Stopped moving circular texts, no record of the last page was rewritten")
+                return moved
+            moved += indexed
+            # The next page must not see the records just rewritten
+            get_client().indices.refresh(index=INDEX_NAME)
 
     def store_in_elastic(self, output):
         # ✅ Store in Elasticsearch
-        try:
-            client.index(index=INDEX_NAME, id=output['downloaded_url'], document=output)
+        doc_id, ok, error = self.bulk_store([output])[0]
+        if ok:
             print("Document Indexed in Elastic Successfully")
+        else:
+            print(f"Error while storing in Elastic: {error}")
+        return ok
+
+    def search(self, circular_date=None, compliance_types=None, text=None, size=50, search_after=None,
+               include_text=False):
+        """Query analysed circulars.
+
+        Args:
+            circular_date (str): Exact listing date, e.g. "Feb 13, 2025"
+            compliance_types (list): Match circulars tagged with any of these types by the LLM or pre-classifier
+            text (str): Full-text query over ``summary`` and the circular text
+            size (int): Page size
+            search_after (list): ``next`` value of the previous page
+            include_text (bool): Also load ``circular_text`` from the text index for every hit
+
+        Returns:
+            dict: ``{"hits": [documents], "total": int, "next": search_after for the next page or None}``
+        """
+        cache_key = json.dumps([circular_date, compliance_types and sorted(compliance_types), text, size,
+                                search_after], sort_keys=True)
+        cached = query_cache.get(cache_key)
+        if cached is not None:
+            metrics.incr("es_query_cache_total", result="hit")
+            return self._with_text(cached, include_text)
+        metrics.incr("es_query_cache_total", result="miss")
+
+        ensure_index()
+        filters, must = [], []
+        if circular_date:
+            filters.append({"term": {"circular_date": circular_date}})
+        if compliance_types:
+            filters.append({"bool": {"should": [{"terms": {"compliance_types": list(compliance_types)}},
+                                                {"terms": {"pre_classifier_tags": list(compliance_types)}}],
+                                     "minimum_should_match": 1}})
+        if text:
+            # Records stored before the text split still carry circular_text inline
+            should = [{"multi_match": {"query": text, "fields": ["summary^2", "circular_text"]}}]
+            matching = self._matching_texts(text)
+            if matching:
+                should.append({"terms": {"text_hash": matching}})
+            must.append({"bool": {"should": should, "minimum_should_match": 1}})
+        query = {"bool": {"filter": filters, "must": must}} if filters or must else {"match_all": {}}
+        sort = (["_score"] if text else []) + [{SORT_FIELD: "asc"}]
+
+        with metrics.span("es_search", size=size):
+            response = get_client().search(index=INDEX_NAME, query=query, sort=sort, size=size,
+                                           search_after=search_after, source_excludes=HEAVY_FIELDS,
+                                           track_total_hits=True)
+        hits = response["hits"]["hits"]
+        result = {
+            "hits": [hit["_source"] for hit in hits],
+            "total": response["hits"]["total"]["value"],
+            "next": hits[-1]["sort"] if len(hits) == size else None,
+        }
+        # Only the compact records are cached, texts are loaded per request
+        query_cache.set(cache_key, result)
+        return self._with_text(result, include_text)
+
+    def _matching_texts(self, text):
+        """Hashes of the stored circular texts matching a full-text query."""
+        with metrics.span("es_search_text"):
+            response = get_client().search(index=TEXT_INDEX_NAME, query={"match": {"text": text}},
+                                           size=TEXT_MATCH_LIMIT, source=False)
+        return [hit["_id"] for hit in response["hits"]["hits"]]
+
+    def _with_text(self, result, include_text):
+        if not include_text:
+            return result
+        return dict(result, hits=self.attach_text(result["hits"]))
+
+    def get_texts(self, text_hashes):
+        """Full circular texts from the text index.
+
+        Args:
+            text_hashes (list): ``text_hash`` values of stored records
+
+        Returns:
+            dict: ``{text_hash: text}``, leaving out texts that are not stored
+        """
+        texts, missing = {}, []
+        for key in dict.fromkeys(filter(None, text_hashes)):
+            cached = text_cache.get(key)
+            if cached is None:
+                missing.append(key)
+            else:
+                texts[key] = cached
+        metrics.incr("es_text_cache_total", len(texts), result="hit")
+        metrics.incr("es_text_cache_total", len(missing), result="miss")
+        if not missing:
+            return texts
+        try:
+            with metrics.span("es_get_text", texts=len(missing)):
+                response = get_client().mget(index=TEXT_INDEX_NAME, ids=missing, source_includes=["compressed"])
+            for doc in response["docs"]:
+                if doc.get("found"):
+                    texts[doc["_id"]] = decompress_text(doc["_source"]["compressed"])
+                    text_cache.set(doc["_id"], texts[doc["_id"]])
+        except Exception as e:
+            logging.error(f"Error while reading circular texts from Elastic: {e}")
+        return texts
+
+    def get_text(self, text_hash):
+        """Full text of one circular by its record's ``text_hash``, or None."""
+        return self.get_texts([text_hash]).get(text_hash) if text_hash else None
+
+    def attach_text(self, records):
+        """Copies of ``records`` with ``circular_text`` loaded from the text index where it is not inline."""
+        texts = self.get_texts([record.get("text_hash") for record in records if "circular_text" not in record])
+        return [dict(record, circular_text=texts[record["text_hash"]])
+                if "circular_text" not in record and record.get("text_hash") in texts else record
+                for record in records]
+
+    def iter_search(self, page_size=100, **filters):
+        """Yield every matching document, paging with search_after."""
+        search_after = None
+        while True:
+            page = self.search(size=page_size, search_after=search_after, **filters)
+            yield from page["hits"]
+            search_after = page["next"]
+            if search_after is None:
+                break
+
+    def get_circulars_for_date(self, circular_date, include_text=False):
+        """All analysed circulars stored for a listing date, without ``circular_text`` by default."""
+        try:
+            return list(self.iter_search(circular_date=circular_date, include_text=include_text))
         except Exception as e:
-            print(f"Error while storing in Elastic: {e}")
+            logging.error(f"Error while reading from Elastic: {e}")
+            return []
 
+    def get_circular(self, doc_id, include_text=True):
+        """Fetch one stored circular by ``downloaded_url``, or None if it is not indexed.
+
+        With ``include_text`` the full text is loaded from the text index as well.
+        """
+        try:
+            with metrics.span("es_get"):
+                response = get_client().get(index=INDEX_NAME, id=doc_id,
+                                            source_excludes=None if include_text else HEAVY_FIELDS)
+            record = response["_source"]
+        except Exception as e:
+            # ✅ NotFoundError (404): a circular seen for the first time is simply not stored yet
+            if getattr(e, "status_code", None) == 404:
+                return None
+            logging.error(f"Error while reading {doc_id} from Elastic: {e}")
+            return None
+        return self.attach_text([record])[0] if include_text else record
@@ -1,14 +1,18 @@
 import logging
+import os
 import requests
-import fitz
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from pydantic import BaseModel, HttpUrl, Field, ConfigDict
 import json
 from typing import List, Type, Dict, Any
-from crewai.tools import BaseTool
-from elasticsearch import Elasticsearch
+from src.utils.metrics import metrics
+from src.utils.pdf_cache import PDFCache, get_pdf_cache
 
-# ✅ Enable Logging
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
+# Concurrency limit for downloads / parsing, overridable from the environment
+PDF_MAX_WORKERS = int(os.getenv("PDF_MAX_WORKERS", "4"))
+# Dumping every extracted circular into the log is expensive, only do it when asked to
+LOG_PDF_PAYLOADS = os.getenv("LOG_PDF_PAYLOADS", "false").lower() == "true"
 
 # Pydantic model for a notification
 class RBINotificationPDFExtractorInput(BaseModel):
@@ -19,15 +23,68 @@ class RBINotificationPDFExtractorInput(BaseModel):
     circular_date: str = Field(..., description="Date of the RBI circulars")
 
 
+def iter_pdf_pages(source):
+    """Lazily yield the text of each page of a PDF.
+
+    Args:
+        source (str | bytes): Path of the PDF on disk, or the raw PDF bytes already in memory
+    """
+    # fitz is only needed once a PDF is actually parsed
+    import fitz
+    if isinstance(source, (bytes, bytearray)):
+        doc = fitz.open(stream=source, filetype="pdf")
+    else:
+        doc = fitz.open(source)
+    try:
+        for page in doc:
+            yield page.get_text("text")
+    finally:
+        doc.close()
+
+
+def extract_pdf_text(source):
+    """Extract the text of every page of a PDF with a single join.
+
+    Kept at module level so it can be shipped to a process pool.
+    """
+    return extract_pdf(source)[0]
+
+
+def extract_pdf(source):
+    """Like :func:`extract_pdf_text`, also returning the number of pages parsed."""
+    pages = list(iter_pdf_pages(source))
+    return "".join(pages), len(pages)
+
+
 class RBINotificationPDFExtractorTool:
     name: str = "RBI fetch pdf content"
     description: str = "Fetches the pdf content from the pdf url"
     args_schema: Type[BaseModel] = RBINotificationPDFExtractorInput
 
+    def __init__(self, max_workers: int = PDF_MAX_WORKERS, parse_in_processes: bool = True,
+                 cache: PDFCache = None, use_cache: bool = True, log_payloads: bool = LOG_PDF_PAYLOADS):
+        """
+        Args:
+            max_workers (int): Upper bound on concurrent downloads and parses. 1 runs serially.
+            parse_in_processes (bool): Parse PDFs on a process pool instead of the download threads.
+            cache (PDFCache): On-disk PDF/text cache, defaults to the process-wide one from the environment.
+            use_cache (bool): Set to False to skip the on-disk cache and parse downloads in memory.
+            log_payloads (bool): Log the full extracted JSON payload at INFO.
+        """
+        self.max_workers = max(1, max_workers)
+        self.parse_in_processes = parse_in_processes
+        self.cache = (cache or get_pdf_cache()) if use_cache else None
+        self.log_payloads = log_payloads
+        # One pooled keep-alive session shared by all download threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
     def download_pdf(self, pdf_url, save_path):
         try:
             # Send a GET request to the PDF URL
-            response = requests.get(pdf_url, stream=True)
+            response = self.session.get(pdf_url, stream=True)
 
             # Check if the request was successful
             if response.status_code == 200:
@@ -43,53 +100,139 @@ class RBINotificationPDFExtractorTool:
             logging.error(f"Error downloading PDF: {str(e)}")
             return None
 
+    def download_pdf_bytes(self, pdf_url):
+        """Download ``pdf_url`` into memory instead of a file, returning the bytes or None."""
+        try:
+            response = self.session.get(pdf_url)
+            if response.status_code == 200:
+                logging.debug(f"Downloaded PDF successfully: {pdf_url}")
+                metrics.incr("http_bytes_total", len(response.content), source="pdf")
+                return response.content
+            logging.error(f"Failed to download PDF: {response.status_code}")
+            return None
+        except Exception as e:
+            logging.error(f"Error downloading PDF: {str(e)}")
+            return None
+
+    def fetch_cached_pdf(self, pdf_url):
+        """Return the cache entry for ``pdf_url``, downloading or revalidating it only when needed."""
+        entry = self.cache.get(pdf_url)
+        if entry and self.cache.is_fresh(entry):
+            self.cache.record_hit(pdf_url)
+            metrics.incr("pdf_cache_total", result="hit")
+            return entry
+        try:
+            response = self.session.get(pdf_url, headers=self.cache.validators(entry))
+            if entry and response.status_code == 304:
+                logging.debug(f"Cached PDF still valid: {pdf_url}")
+                self.cache.record_hit(pdf_url, revalidated=True)
+                metrics.incr("pdf_cache_total", result="revalidated")
+                return entry
+            if response.status_code == 200:
+                logging.debug(f"Downloaded PDF successfully: {pdf_url}")
+                metrics.incr("pdf_cache_total", result="miss")
+                metrics.incr("http_bytes_total", len(response.content), source="pdf")
+                return self.cache.put_pdf(pdf_url, response.content,
+                                          etag=response.headers.get("ETag"),
+                                          last_modified=response.headers.get("Last-Modified"))
+            logging.error(f"Failed to download PDF: {response.status_code}")
+            return None
+        except Exception as e:
+            logging.error(f"Error downloading PDF: {str(e)}")
+            return None
+
 
-    def read_pdf(self, pdf_path):
+    def read_pdf(self, pdf_source, parser: Executor = None):
         try:
-            doc = fitz.open(pdf_path)
-            full_text = ""
-            for page_num in range(doc.page_count):
-                page = doc.load_page(page_num)
-                full_text += page.get_text("text")
-            return full_text
+            with metrics.span("read_pdf") as span:
+                if parser is not None:
+                    text, pages = parser.submit(extract_pdf, pdf_source).result()
+                else:
+                    text, pages = extract_pdf(pdf_source)
+                span["pages"] = pages
+            metrics.incr("pdf_pages_parsed_total", pages)
+            return text
         except Exception as e:
             logging.error(f"Error reading PDF: {str(e)}")
             return None
 
-    def process_notification(self, notification):
-        name = notification.get("name")
+    def download_notification(self, notification):
+        """Download stage: fetch the notification's PDF through the cache, or into memory.
+
+        Returns:
+            dict: ``{"entry": cache entry}`` or ``{"pdf_bytes": bytes}``, None if the download failed
+        """
+        pdf_url = notification.get("pdf_url")
+        logging.debug(f"Processing PDF for: {notification.get('name')}")
+        with metrics.span("download_pdf", url=pdf_url):
+            if self.cache is not None:
+                entry = self.fetch_cached_pdf(pdf_url)
+                return {"entry": entry} if entry else None
+            pdf_bytes = self.download_pdf_bytes(pdf_url)
+            return {"pdf_bytes": pdf_bytes} if pdf_bytes else None
+
+    def extract_notification(self, notification, download, parser: Executor = None):
+        """Extract stage: turn a downloaded PDF into the circular dict, reusing cached text."""
         pdf_url = notification.get("pdf_url")
-        notification_url = notification.get("notification_url")
-        circular_date = notification.get("circular_date")
-        output = {}
+        entry = download.get("entry")
+        if entry is not None:
+            pdf_text = self.cache.get_text(entry)
+            if pdf_text is None:
+                pdf_text = self.read_pdf(self.cache.pdf_path(entry), parser)
+                if pdf_text is not None:
+                    self.cache.put_text(entry, pdf_text)
+        else:
+            pdf_text = self.read_pdf(download["pdf_bytes"], parser)
+        return {
+            "name": notification.get("name"),
+            "pdf_url": pdf_url,
+            "notification_url": notification.get("notification_url"),
+            "circular_text": pdf_text,
+            # Keep the bare file name as downloaded_url, it is the Elasticsearch document id
+            "downloaded_url": pdf_url.split('/')[-1],
+            "circular_date": notification.get("circular_date")
+        }
 
+    def process_notification(self, notification, parser: Executor = None):
         # Download and read from the direct PDF URL
-        logging.debug(f"Processing PDF for: {name}")
-        pdf_file_path = pdf_url.split('/')[-1]  # Limit the name for the file path
-        downloaded_url = self.download_pdf(pdf_url, pdf_file_path)
-        if downloaded_url:
-            pdf_text = self.read_pdf(downloaded_url)
-            output = {
-                "name": name,
-                "pdf_url": pdf_url,
-                "notification_url": notification_url,
-                "circular_text": pdf_text,
-                "downloaded_url": downloaded_url,
-                "circular_date": circular_date
-            }
-        return output
+        download = self.download_notification(notification)
+        if not download:
+            return {}
+        return self.extract_notification(notification, download, parser)
     
+    def process_notifications(self, notifications):
+        """Download and parse notifications concurrently, returning results in input order.
+
+        Downloads run on a bounded thread pool sharing one HTTP session; parsing is
+        handed off to a process pool so fitz does not hold up the download threads.
+        """
+        if self.max_workers == 1 or len(notifications) <= 1:
+            return [self.process_notification(notification) for notification in notifications]
+
+        workers = min(self.max_workers, len(notifications))
+        parser = ProcessPoolExecutor(max_workers=workers) if self.parse_in_processes else None
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(self.process_notification, notification, parser)
+                           for notification in notifications]
+                return [future.result() for future in futures]
+        finally:
+            if parser is not None:
+                parser.shutdown()
+
     def _run(self, notifications: List[RBINotificationPDFExtractorInput]) -> list:
         print(f"inside run with arguments==={notifications}")
         # Process each notification and print JSON output
         output_list = []
-        for notification in notifications:
-            result = self.process_notification(notification)
+        for result in self.process_notifications(notifications):
             if result:
                 output_list.append(result)
         # Convert the result to JSON format
-        output_json = json.dumps(output_list, indent=4)
-        logging.info(f"Getting pdf content from the URL: {output_json}")
+        output_json = json.dumps(output_list)
+        if self.log_payloads:
+            logging.info(f"Getting pdf content from the URL: {output_json}")
+        else:
+            logging.info(f"Extracted {len(output_list)} circulars ({len(output_json)} characters of JSON)")
         return output_json
         # return output_list
     
\ No newline at end of file
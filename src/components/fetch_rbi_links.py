@@ -1,17 +1,122 @@
 import logging
 import json
+import os
+import threading
+from importlib.util import find_spec
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin
 from crewai.tools import BaseTool
 from typing import Type, Optional, List, Dict
 from datetime import datetime
 from pydantic import BaseModel, model_validator, ValidationError
+from src.utils.metrics import metrics
+from src.utils.ttl_cache import TTLCache
 
 # Base URL of the RBI Notification Page
 BASE_URL = "https://www.rbi.org.in/Scripts/NotificationUser.aspx"
-# ✅ Enable Logging
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
+# ✅ Prefer the C-backed lxml parser, fall back to the pure-Python html.parser.
+# bs4 itself is imported on first parse to keep module import cheap.
+HTML_PARSER = "lxml" if find_spec("lxml") else "html.parser"
+
+FORM_FIELDS = ("__VIEWSTATE", "__EVENTVALIDATION", "__VIEWSTATEGENERATOR")
+
+
+def parse_form_data(content, parser=HTML_PARSER, strain=True):
+    """ Extract the ASP.NET hidden form fields, building a tree of only those inputs when ``strain`` is set """
+    from bs4 import BeautifulSoup, SoupStrainer
+    parse_only = SoupStrainer("input", attrs={"name": list(FORM_FIELDS)}) if strain else None
+    soup = BeautifulSoup(content, parser, parse_only=parse_only)
+    return {field: soup.find("input", {"name": field})["value"] for field in FORM_FIELDS}
+
+
+def parse_month_listing(content, parser=HTML_PARSER, strain=True):
+    """ Parse a monthly listing page into ``{date header: [notification, ...]}``
+
+    Args:
+        content (bytes | str): HTML of the month page
+        parser (str): BeautifulSoup tree builder, "lxml" when available
+        strain (bool): Only build the tree for the ``pnlDetails`` panel
+
+    Returns:
+        dict: notifications grouped by date, None when the content panel is missing
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+    parse_only = SoupStrainer("div", id="pnlDetails") if strain else None
+    soup = BeautifulSoup(content, parser, parse_only=parse_only)
+
+    # Find the content div that contains the notifications
+    content_div = soup.find('div', {'id': 'pnlDetails'})
+    if not content_div:
+        return None
+
+    notifications = {}
+    current_date = None
+    current_notifications = []
+
+    for row in content_div.find_all('tr'):
+        # Single pass over the row's cells and links instead of one search per lookup
+        date_header = notification_link = None
+        pdf_link_tag = []
+        for tag in row.find_all(('td', 'a')):
+            classes = tag.get('class') or ()
+            if tag.name == 'td':
+                if date_header is None and 'tableheader' in classes:
+                    date_header = tag
+            else:
+                if notification_link is None and 'link2' in classes:
+                    notification_link = tag
+                if tag.has_attr('href'):
+                    pdf_link_tag.append(tag)
+
+        # Look for date headers
+        if date_header:
+            if current_date:
+                notifications[current_date] = current_notifications
+            current_date = date_header.get_text(strip=True)
+            current_notifications = []
+
+        elif current_date and notification_link:
+            # Extract the PDF link
+            pdf_url = None
+            if len(pdf_link_tag) > 1:
+                pdf_url = urljoin(BASE_URL, pdf_link_tag[1]['href'])
+
+            # Append notification data
+            current_notifications.append({
+                'name': notification_link.get_text(strip=True),
+                'notification_url': urljoin(BASE_URL, notification_link.get('href')),
+                'pdf_url': pdf_url,
+                'circular_date': current_date
+            })
+
+    # Append the last set of notifications
+    if current_date:
+        notifications[current_date] = current_notifications
+
+    return notifications
+
+# ✅ Process-wide caches shared by every Streamlit session. The current month's listing
+# keeps changing during the day, earlier months are effectively frozen.
+LISTING_CACHE_TTL_SECONDS = int(os.getenv("LISTING_CACHE_TTL_SECONDS", "900"))
+PAST_LISTING_CACHE_TTL_SECONDS = int(os.getenv("PAST_LISTING_CACHE_TTL_SECONDS", str(24 * 3600)))
+FORM_DATA_CACHE_TTL_SECONDS = int(os.getenv("FORM_DATA_CACHE_TTL_SECONDS", "900"))
+
+listing_cache = TTLCache(LISTING_CACHE_TTL_SECONDS)
+form_data_cache = TTLCache(FORM_DATA_CACHE_TTL_SECONDS, max_entries=1)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the shared keep-alive session used for every RBI scrape in this process."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        return _session
 
 # Define the Pydantic model for input validation
 class RBIFetchToolInput(BaseModel):
@@ -53,100 +158,116 @@ class RBIFetchTool(BaseTool):
     # Function to fetch the form data (e.g., __VIEWSTATE, __EVENTVALIDATION)
     def fetch_form_data(self, session):
         """ Fetch the form data (e.g., __VIEWSTATE, __EVENTVALIDATION) """
-        response = session.get(BASE_URL)
+        with metrics.span("fetch_form_data") as span:
+            response = session.get(BASE_URL)
+            span["status"] = response.status_code
+            span["bytes"] = len(response.content)
+        metrics.incr("http_bytes_total", len(response.content), source="rbi_listing")
         
         if response.status_code != 200:
             logging.error("Failed to fetch the page.")
             return None
 
-        # Parse the page content using BeautifulSoup
-        soup = BeautifulSoup(response.content, "html.parser")
-        
-        # Extract hidden fields from the form
-        viewstate = soup.find("input", {"name": "__VIEWSTATE"})["value"]
-        eventvalidation = soup.find("input", {"name": "__EVENTVALIDATION"})["value"]
-        viewstategenerator = soup.find("input", {"name": "__VIEWSTATEGENERATOR"})["value"]
-        
+        # Parse only the hidden inputs of the form
         # You can also extract the __EVENTTARGET and __EVENTARGUMENT values if required
-        return {
-            "__VIEWSTATE": viewstate,
-            "__EVENTVALIDATION": eventvalidation,
-            "__VIEWSTATEGENERATOR": viewstategenerator
-        }
+        return parse_form_data(response.content)
 
-    def fetch_notifications_for_date(self, input_date, session):
-        """ Fetch notifications for the input date """
-        # Fetch the form data first
-        form_data = self.fetch_form_data(session)
+    def get_form_data(self, session):
+        """ Hidden form fields, served from the process-wide cache when still fresh """
+        return form_data_cache.get_or_set(BASE_URL, lambda: self.fetch_form_data(session))
+
+    def get_month_listing(self, year, month, session):
+        """ Cached wrapper around fetch_month_listing shared across sessions and reruns """
+        today = datetime.now()
+        ttl = LISTING_CACHE_TTL_SECONDS if (year, month) >= (today.year, today.month) else PAST_LISTING_CACHE_TTL_SECONDS
+
+        def scrape():
+            listing = self.fetch_month_listing(year, month, session, self.get_form_data(session))
+            if not listing:
+                # The cached form state may have expired, refresh it once and retry the month
+                form_data_cache.invalidate()
+                listing = self.fetch_month_listing(year, month, session, self.get_form_data(session))
+            return listing
+
+        return listing_cache.get_or_set((year, month), scrape, ttl_seconds=ttl)
+
+    def fetch_month_listing(self, year, month, session, form_data=None):
+        """ Fetch every notification listed for a month, grouped by date header
+
+        Args:
+            year (int): Listing year
+            month (int): Listing month
+            session (requests.Session): Session holding the ASP.NET cookies
+            form_data (dict): Hidden form fields from fetch_form_data, fetched when not given
+
+        Returns:
+            dict: ``{"Feb 13, 2025": [notification, ...], ...}``, empty on failure
+        """
+        if form_data is None:
+            form_data = self.fetch_form_data(session)
         if not form_data:
             return {}
         # Add the year and month to the form data
-        inp_date, year, month = input_date.date, input_date.year, input_date.month
+        form_data = dict(form_data)
         form_data["hdnYear"] = str(year)
         form_data["hdnMonth"] = str(month)  # You can set this to 0 if you want to fetch all months
 
         # Send a POST request to submit the form
-        response = session.post(BASE_URL, data=form_data)
+        with metrics.span("fetch_month_listing", year=year, month=month) as span:
+            response = session.post(BASE_URL, data=form_data)
+            span["status"] = response.status_code
+            span["bytes"] = len(response.content)
+        metrics.incr("http_bytes_total", len(response.content), source="rbi_listing")
 
         if response.status_code != 200:
             logging.error(f"Failed to fetch data for {year}-{month}.")
             return {}
 
         # Parse the response content
-        soup = BeautifulSoup(response.content, "html.parser")
-        
-        # Find the content div that contains the notifications
-        content_div = soup.find('div', {'id': 'pnlDetails'})
-        
-        if not content_div:
+        with metrics.span("parse_month_listing"):
+            notifications = parse_month_listing(response.content)
+        if notifications is None:
             logging.error("Failed to find the content area.")
             return {}
 
-        # Extract all notifications and PDF links
-        notifications = {}
-        table_rows = content_div.find_all('tr')
-        
-        current_date = None
-        current_notifications = []
-
-        for row in table_rows:
-            # Look for date headers
-            date_header = row.find('td', class_='tableheader')
-
-            if date_header:
-                if current_date:
-                    notifications[current_date] = current_notifications
-                current_date = date_header.get_text(strip=True)
-                current_notifications = []
-
-            elif current_date==inp_date:
-                # Extract notification and PDF link data
-                notification_link = row.find('a', class_='link2')
-                pdf_link_tag = row.find_all('a', href=True)
-
-                if notification_link:
-                    notification_name = notification_link.get_text(strip=True)
-                    notification_url = notification_link.get('href')
-
-                    # Extract the PDF link
-                    pdf_url = None
-                    if len(pdf_link_tag) > 1:
-                        pdf_url = pdf_link_tag[1]['href']
-                        pdf_url = urljoin(BASE_URL, pdf_url)
-
-                    # Append notification data
-                    current_notifications.append({
-                        'name': notification_name,
-                        'notification_url': urljoin(BASE_URL, notification_url),
-                        'pdf_url': pdf_url,
-                        'circular_date': inp_date
-                    })
-
-        # Append the last set of notifications
-        if current_date:
-            notifications[current_date] = current_notifications
-
-        return notifications[inp_date]
+        return notifications
+
+    def fetch_notifications_for_date(self, input_date, session):
+        """ Fetch notifications for the input date """
+        notifications = self.get_month_listing(input_date.year, input_date.month, session)
+        return notifications.get(input_date.date, [])
+
+    def iter_notifications_for_range(self, start_date, end_date, session=None):
+        """ Yield ``(date, notifications)`` for every listed date between two dates, one month page at a time
+
+        Each month page is scraped once and the ASP.NET form state from the landing page is
+        cached and reused for every month, so a year of backfill costs one GET and twelve POSTs.
+
+        Args:
+            start_date (datetime.date): First date to include
+            end_date (datetime.date): Last date to include
+            session (requests.Session): Optional session to reuse
+        """
+        session = session or get_session()
+        year, month = start_date.year, start_date.month
+        while (year, month) <= (end_date.year, end_date.month):
+            listing = self.get_month_listing(year, month, session)
+            dated = []
+            for date_str, notifications in listing.items():
+                try:
+                    listed_on = datetime.strptime(date_str, '%b %d, %Y').date()
+                except ValueError:
+                    logging.warning(f"Skipping unrecognised date header {date_str!r}")
+                    continue
+                if start_date <= listed_on <= end_date and notifications:
+                    dated.append((listed_on, date_str, notifications))
+            for _, date_str, notifications in sorted(dated):
+                yield date_str, notifications
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    def fetch_notifications_for_range(self, start_date, end_date, session=None):
+        """ Fetch notifications between two dates grouped by date """
+        return dict(self.iter_notifications_for_range(start_date, end_date, session))
 
     def _run(self, date: str) -> list:
         """ function to run the tool """
@@ -154,8 +275,8 @@ class RBIFetchTool(BaseTool):
             print(f"inside rbi link fetch run function {date}")
             validated_input = self.args_schema(date=date)
 
-            # Create a session to persist cookies
-            session = requests.Session()
+            # Reuse the shared keep-alive session, it also persists cookies
+            session = get_session()
             print(f"Fetching circular links from RBI website for date {validated_input}")
 
             # Fetch notifications for the specific year and month
@@ -0,0 +1,248 @@
+import json
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from src.components.fetch_rbi_links import RBIFetchTool, get_session
+from src.components.fetch_pdf_content import RBINotificationPDFExtractorTool
+from src.components.elasticsearch_oper import ElasticSearchTool
+from src.components.duplicate_detector import DuplicateDetector, get_duplicate_detector
+from src.utils.metrics import metrics
+from src.components.circular_analyzer import (ANALYSIS_MAX_RETRIES, ANALYSIS_MAX_WORKERS,
+                                              ANALYSIS_REQUESTS_PER_MINUTE, RateLimiter, analyse_with_retries,
+                                              get_circular_service)
+
+#--------------------------------#
+#   Scrape-to-Index Pipeline     #
+#--------------------------------#
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "8"))
+PIPELINE_DOWNLOAD_WORKERS = int(os.getenv("PIPELINE_DOWNLOAD_WORKERS", "4"))
+PIPELINE_EXTRACT_WORKERS = int(os.getenv("PIPELINE_EXTRACT_WORKERS", "2"))
+
+_DONE = object()
+
+
+def notifications_for_date(date_str, fetcher=None):
+    """Pipeline source for a single "Feb 13, 2025" date, as picked in the app."""
+    fetcher = fetcher or RBIFetchTool()
+    validated_input = fetcher.args_schema(date=date_str)
+    notifications = fetcher.fetch_notifications_for_date(validated_input, get_session())
+    if notifications:
+        yield date_str, notifications
+
+
+def skip_stored(source, records):
+    """Wrap a pipeline source, dropping circulars already stored as ``records`` (matched on ``pdf_url``)."""
+    stored = {record.get("pdf_url") for record in records}
+    for date_str, notifications in source:
+        remaining = [notification for notification in notifications if notification.get("pdf_url") not in stored]
+        if remaining:
+            yield date_str, remaining
+
+
+def notifications_for_range(start_date, end_date, fetcher=None):
+    """Pipeline source for a date range, scraping each month page once."""
+    fetcher = fetcher or RBIFetchTool()
+    yield from fetcher.iter_notifications_for_range(start_date, end_date)
+
+
+class CircularPipeline:
+    """Fetch → download → extract → analyse → index, with bounded queues between stages.
+
+    Every stage runs on its own threads, so the first circular is being analysed while
+    later ones are still downloading, and a full queue blocks the stage feeding it
+    (backpressure) instead of piling up PDFs in memory. Items move between stages as
+    plain dicts. Before analysis, the duplicate detector flags re-issued and amended
+    circulars so only their changed sections reach the crew. ``run`` yields progress
+    events as they happen:
+
+    - ``{"event": "found", "date": ..., "count": n}`` once a date's listing is scraped
+    - ``{"event": "analysed", "seq": i, "circular": {...}}`` when a circular's analysis is ready
+    - ``{"event": "indexed", "seq": i, "circular": {...}, "ok": bool, "error": ...}`` after indexing
+    - ``{"event": "failed", "seq": i, "stage": ..., "circular": {...}, "error": ...}`` on any stage error
+
+    ``seq`` numbers circulars in listing order.
+    """
+
+    def __init__(self, extractor: RBINotificationPDFExtractorTool = None, eb: ElasticSearchTool = None,
+                 download_workers: int = PIPELINE_DOWNLOAD_WORKERS, extract_workers: int = PIPELINE_EXTRACT_WORKERS,
+                 analyse_workers: int = ANALYSIS_MAX_WORKERS, queue_size: int = PIPELINE_QUEUE_SIZE,
+                 requests_per_minute: int = ANALYSIS_REQUESTS_PER_MINUTE, max_retries: int = ANALYSIS_MAX_RETRIES,
+                 analyse: bool = True, force_refresh: bool = False, initializer=None, service=None,
+                 detector: DuplicateDetector = None, detect_duplicates: bool = True):
+        """
+        Args:
+            extractor (RBINotificationPDFExtractorTool): PDF download / extraction tool
+            eb (ElasticSearchTool): Index writer, documents are flushed in bulk as they arrive
+            download_workers, extract_workers, analyse_workers (int): Concurrency of each stage
+            queue_size (int): Capacity of every inter-stage queue
+            analyse (bool): Set to False to index extracted text without running the crew
+            force_refresh (bool): Ignore cached analyses
+            initializer (callable): Run in every stage thread before it starts, e.g. to attach UI context
+            service (CircularService): Pre-built crews reused for every circular, the process-wide one by default
+            detector (DuplicateDetector): Re-issue/amendment detector, the process-wide one by default
+            detect_duplicates (bool): Set to False to analyse every circular from scratch
+        """
+        self.extractor = extractor or RBINotificationPDFExtractorTool()
+        self.eb = eb or ElasticSearchTool()
+        self.download_workers = download_workers
+        self.extract_workers = extract_workers
+        self.analyse_workers = analyse_workers
+        self.queue_size = queue_size
+        self.limiter = RateLimiter(requests_per_minute)
+        self.max_retries = max_retries
+        self.analyse = analyse
+        self.force_refresh = force_refresh
+        self.initializer = initializer
+        self.service = service or (get_circular_service() if analyse else None)
+        self.detector = (detector or get_duplicate_detector(self.eb.get_circular)) if detect_duplicates else None
+
+    def _stage(self, name, func, workers, inbox, outbox, events):
+        """Start ``workers`` threads applying ``func`` to items from ``inbox``.
+
+        ``func`` returns the item for ``outbox`` or None to drop it. The last worker to
+        finish passes the end-of-stream marker on.
+        """
+        remaining = [workers]
+        lock = threading.Lock()
+
+        def worker():
+            if self.initializer:
+                self.initializer()
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    # Let sibling workers see the marker too
+                    inbox.put(_DONE)
+                    break
+                try:
+                    with metrics.span(f"stage_{name}"):
+                        result = func(item)
+                except Exception as e:
+                    logging.error(f"Pipeline stage {name} failed for {item.get('name')}: {e}")
+                    events.put({"event": "failed", "seq": item["seq"], "stage": name, "circular": item, "error": e})
+                    continue
+                if result is not None and outbox is not None:
+                    outbox.put(result)
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and outbox is not None:
+                outbox.put(_DONE)
+
+        threads = [threading.Thread(target=worker, name=f"pipeline-{name}-{i}", daemon=True) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def run(self, source):
+        """Push ``(date, notifications)`` batches from ``source`` through every stage, yielding events."""
+        events = queue.Queue()
+        to_download, to_extract, to_analyse, to_index = (queue.Queue(self.queue_size) for _ in range(4))
+        parser = ProcessPoolExecutor(max_workers=self.extract_workers) if self.extractor.parse_in_processes else None
+
+        def fetch():
+            if self.initializer:
+                self.initializer()
+            seq = 0
+            try:
+                for date_str, notifications in source:
+                    events.put({"event": "found", "date": date_str, "count": len(notifications)})
+                    for notification in notifications:
+                        to_download.put(dict(notification, seq=seq))
+                        seq += 1
+            except Exception as e:
+                logging.error(f"Pipeline fetch failed: {e}")
+                events.put({"event": "failed", "seq": None, "stage": "fetch", "circular": None, "error": e})
+            finally:
+                to_download.put(_DONE)
+
+        def download(notification):
+            result = self.extractor.download_notification(notification)
+            if not result:
+                raise RuntimeError(f"Could not download {notification.get('pdf_url')}")
+            return {"notification": notification, "download": result, "seq": notification["seq"],
+                    "name": notification.get("name")}
+
+        def extract(item):
+            circular = self.extractor.extract_notification(item["notification"], item["download"], parser)
+            if circular.get("circular_text") is None:
+                # Unreadable PDF: fail the circular so it is retried instead of indexed without text
+                raise RuntimeError(f"Could not read {item['notification'].get('pdf_url')}")
+            circular["seq"] = item["seq"]
+            return circular
+
+        def analyse(circular):
+            amendment = None
+            if self.detector is not None:
+                amendment = self.detector.inspect(circular, reuse=not self.force_refresh)
+            if self.analyse:
+                result = analyse_with_retries(circular, self.limiter, self.max_retries,
+                                              force_refresh=self.force_refresh, service=self.service,
+                                              amendment=amendment)
+                circular.update(json.loads(result.raw))
+                events.put({"event": "analysed", "seq": circular["seq"], "circular": circular})
+            # Lets readers tell --skip-analysis records apart from analysed ones
+            circular["analysed"] = self.analyse
+            return circular
+
+        def report(results, pending):
+            for doc_id, ok, error in results:
+                seq, document = pending.pop(doc_id, (None, None))
+                if ok and document and self.detector is not None:
+                    try:
+                        self.detector.add(document)
+                    except Exception as e:
+                        logging.error(f"Could not add {doc_id} to the similarity index: {e}")
+                events.put({"event": "indexed", "seq": seq, "circular": document, "ok": ok, "error": error})
+
+        def fail_pending(pending, error):
+            logging.error(f"Indexing into Elastic failed: {error}")
+            report([(doc_id, False, error) for doc_id in list(pending)], pending)
+
+        def index():
+            if self.initializer:
+                self.initializer()
+            pending = {}
+            try:
+                while True:
+                    circular = to_index.get()
+                    if circular is _DONE:
+                        break
+                    document = {key: value for key, value in circular.items() if key != "seq"}
+                    pending[document["downloaded_url"]] = (circular["seq"], document)
+                    # Keep draining the queue after a failure, so upstream stages never block on it
+                    try:
+                        report(self.eb.add(document), pending)
+                    except Exception as e:
+                        fail_pending(pending, e)
+                try:
+                    report(self.eb.flush(), pending)
+                except Exception as e:
+                    fail_pending(pending, e)
+                if self.detector is not None:
+                    try:
+                        self.detector.save()
+                    except Exception as e:
+                        logging.error(f"Could not save the similarity index: {e}")
+            except Exception as e:
+                fail_pending(pending, e)
+            finally:
+                events.put(_DONE)
+
+        threading.Thread(target=fetch, name="pipeline-fetch", daemon=True).start()
+        self._stage("download", download, self.download_workers, to_download, to_extract, events)
+        self._stage("extract", extract, self.extract_workers, to_extract, to_analyse, events)
+        self._stage("analyse", analyse, self.analyse_workers, to_analyse, to_index, events)
+        threading.Thread(target=index, name="pipeline-index", daemon=True).start()
+
+        try:
+            while True:
+                event = events.get()
+                if event is _DONE:
+                    break
+                yield event
+        finally:
+            if parser is not None:
+                parser.shutdown()
@@ -0,0 +1,233 @@
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dotenv import load_dotenv
+from src.components.pre_classifier import COMPLIANCE_TYPES, PreClassifier, canonical_types
+from src.utils.chunking import split_circular
+
+load_dotenv()
+
+#--------------------------------#
+#      Company Policy Store      #
+#--------------------------------#
+POLICY_DIR = os.getenv("POLICY_DIR", os.path.join("knowledge", "policies"))
+POLICY_STORE_PATH = os.getenv("POLICY_STORE_PATH", "db")
+POLICY_COLLECTION = os.getenv("POLICY_COLLECTION", "company_policies")
+POLICY_CHUNK_TOKENS = int(os.getenv("POLICY_CHUNK_TOKENS", "400"))
+POLICY_TOP_K = int(os.getenv("POLICY_TOP_K", "5"))
+# Seconds between checks of POLICY_DIR for added, edited or deleted policy files
+POLICY_SYNC_SECONDS = float(os.getenv("POLICY_SYNC_SECONDS", "60"))
+
+POLICY_EXTENSIONS = (".txt", ".md", ".pdf")
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Minimal in-memory Okapi BM25 over policy passages."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(_tokenize(document)) for document in documents]
+        self.lengths = [sum(freqs.values()) for freqs in self.term_freqs]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        doc_freq = Counter(term for freqs in self.term_freqs for term in freqs)
+        total = len(documents)
+        self.idf = {term: math.log(1 + (total - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def scores(self, query):
+        terms = set(_tokenize(query))
+        scores = []
+        for freqs, length in zip(self.term_freqs, self.lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+
+def _read_policy(path):
+    if path.lower().endswith(".pdf"):
+        # Imported lazily, only PDF policies need fitz
+        from src.components.fetch_pdf_content import extract_pdf_text
+        return extract_pdf_text(path)
+    with open(path, "r", encoding="utf-8", errors="ignore") as file:
+        return file.read()
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PolicyStore:
+    """Chunked company policies indexed in Chroma (vectors) and BM25 (keywords).
+
+    ``sync`` re-embeds only policy files whose content changed since the last run, and
+    ``retrieve`` fuses both rankings so a comparison prompt only carries the top-k
+    passages relevant to a circular's compliance types. ``refresh`` re-syncs a
+    long-running process when the files' modification times or sizes change.
+    """
+
+    def __init__(self, policy_dir: str = POLICY_DIR, store_path: str = POLICY_STORE_PATH,
+                 collection_name: str = POLICY_COLLECTION, chunk_tokens: int = POLICY_CHUNK_TOKENS):
+        # Chroma pulls in onnxruntime and friends, keep it off the import path
+        import chromadb
+        self.policy_dir = policy_dir
+        self.chunk_tokens = chunk_tokens
+        self.collection = chromadb.PersistentClient(path=store_path).get_or_create_collection(collection_name)
+        self.tagger = PreClassifier()
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._checked_at = None
+        self._load_passages()
+
+    def _load_passages(self):
+        stored = self.collection.get(include=["documents", "metadatas"])
+        self.ids = stored["ids"]
+        self.documents = stored["documents"]
+        self.metadatas = stored["metadatas"]
+        self.bm25 = BM25Index(self.documents)
+        # Passage ids embed each file's hash, so this changes whenever a policy does
+        self.version = hashlib.sha256("\n".join(sorted(self.ids)).encode("utf-8")).hexdigest()[:16]
+
+    def _policy_files(self):
+        if not os.path.isdir(self.policy_dir):
+            return []
+        return sorted(os.path.join(root, name)
+                      for root, _, names in os.walk(self.policy_dir)
+                      for name in names if name.lower().endswith(POLICY_EXTENSIONS))
+
+    def _files_fingerprint(self, files):
+        fingerprint = []
+        for path in files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        return fingerprint
+
+    def refresh(self, max_age: float = POLICY_SYNC_SECONDS):
+        """Sync again if ``max_age`` seconds passed since the last check and a policy file changed.
+
+        Returns:
+            int: number of files re-indexed
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < max_age:
+            return 0
+        self._checked_at = now
+        if self._files_fingerprint(self._policy_files()) == self._fingerprint:
+            return 0
+        return self.sync()
+
+    def sync(self):
+        """Index new or changed policy files and drop deleted ones. Returns the number of files re-indexed."""
+        with self._lock:
+            indexed = {}
+            for metadata in self.metadatas:
+                indexed[metadata["source"]] = metadata["file_hash"]
+            files = self._policy_files()
+            if not files:
+                logging.warning(f"No policy files in {self.policy_dir}, comparisons will have no policy passages")
+            fingerprint = self._files_fingerprint(files)
+            self._checked_at = time.monotonic()
+            changed = 0
+            for path in files:
+                file_hash = _file_hash(path)
+                if indexed.get(path) == file_hash:
+                    continue
+                self.collection.delete(where={"source": path})
+                chunks = split_circular(_read_policy(path), self.chunk_tokens)
+                if chunks:
+                    path_id = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+                    self.collection.add(
+                        ids=[f"{path_id}:{file_hash[:16]}:{index}" for index in range(len(chunks))],
+                        documents=chunks,
+                        metadatas=[{"source": path, "file_hash": file_hash, "chunk": index,
+                                    "compliance_types": ",".join(self.tagger.tag(chunk))}
+                                   for index, chunk in enumerate(chunks)],
+                    )
+                changed += 1
+                logging.info(f"Indexed {len(chunks)} passages from policy {path}")
+            for path in set(indexed) - set(files):
+                self.collection.delete(where={"source": path})
+                changed += 1
+                logging.info(f"Removed deleted policy {path}")
+            if changed:
+                self._load_passages()
+            # Only set once every file is indexed, so a failed sync is retried by the next refresh
+            self._fingerprint = fingerprint
+            return changed
+
+    def retrieve(self, circular, k: int = POLICY_TOP_K, candidates: int = 20):
+        """Return the top-k policy passages for an analysed circular.
+
+        The query is built from the circular's compliance types (plus their keywords) and
+        summary. Vector and BM25 rankings are combined with reciprocal rank fusion, and
+        passages tagged with one of the circular's types are preferred.
+
+        Returns:
+            list: ``{"source", "chunk", "text"}`` dicts, best first
+        """
+        if not self.documents:
+            return []
+        types = canonical_types(circular.get("compliance_types") or
+                                [detail.get("type") for detail in circular.get("compliance_types_details") or []])
+        keywords = [alias for category in types for alias in COMPLIANCE_TYPES[category]]
+        query = " ".join([*types, *keywords, circular.get("summary") or ""]).strip() or circular.get("name", "")
+
+        fused = Counter()
+        vector = self.collection.query(query_texts=[query], n_results=min(candidates, len(self.ids)))
+        for rank, passage_id in enumerate(vector["ids"][0]):
+            fused[passage_id] += 1.0 / (60 + rank)
+        bm25_scores = self.bm25.scores(query)
+        bm25_ranked = sorted(range(len(self.ids)), key=lambda i: bm25_scores[i], reverse=True)[:candidates]
+        for rank, position in enumerate(bm25_ranked):
+            if bm25_scores[position] > 0:
+                fused[self.ids[position]] += 1.0 / (60 + rank)
+
+        positions = {passage_id: position for position, passage_id in enumerate(self.ids)}
+        ranked = [positions[passage_id] for passage_id, _ in fused.most_common() if passage_id in positions]
+        if types:
+            matching = [position for position in ranked
+                        if set(self.metadatas[position]["compliance_types"].split(",")) & set(types)]
+            ranked = matching or ranked
+        return [{"source": self.metadatas[position]["source"], "chunk": self.metadatas[position]["chunk"],
+                 "text": self.documents[position]} for position in ranked[:k]]
+
+
+_policy_store = None
+_policy_store_lock = threading.Lock()
+
+
+def get_policy_store():
+    """Process-wide policy store, synced with POLICY_DIR on first use and every POLICY_SYNC_SECONDS after."""
+    global _policy_store
+    with _policy_store_lock:
+        if _policy_store is None:
+            _policy_store = PolicyStore()
+            _policy_store.sync()
+        else:
+            try:
+                _policy_store.refresh()
+            except Exception as e:
+                # Keep serving the passages indexed so far
+                logging.error(f"Could not re-sync company policies: {e}")
+        return _policy_store
@@ -0,0 +1,156 @@
+import logging
+import os
+import pickle
+import re
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# The only compliance types the analysis prompt tracks with the tags the LLM uses for them,
+# in the order merged reports list them
+COMPLIANCE_TYPES = {
+    "Know Your Customer": ("kyc", "know your customer"),
+    "Anti-Money Laundering": ("aml", "anti-money laundering", "money laundering"),
+    "Grievance Redressal Mechanism": ("grm", "grievance"),
+    "Loan Restructuring": ("loan restructuring", "restructuring"),
+    "Export-Import Control": ("export", "import", "exim"),
+    "Foreign Exchange Management Act": ("fema", "foreign exchange"),
+}
+
+# Pre-filter settings: set PRECLASSIFIER_ENABLED=false to send every circular to the LLM
+PRECLASSIFIER_ENABLED = os.getenv("PRECLASSIFIER_ENABLED", "true").lower() == "true"
+PRECLASSIFIER_MIN_HITS = int(os.getenv("PRECLASSIFIER_MIN_HITS", "1"))
+PRECLASSIFIER_MODEL = os.getenv("PRECLASSIFIER_MODEL")  # pickled TfidfPreClassifier
+PRECLASSIFIER_THRESHOLD = float(os.getenv("PRECLASSIFIER_THRESHOLD", "0.3"))
+
+# ✅ Keyword / regex rules per compliance type
+KEYWORD_RULES = {
+    "Know Your Customer": [
+        r"\bKYC\b", r"know your customer", r"customer due diligence", r"\bCDD\b", r"\bV-?CIP\b",
+        r"officially valid document", r"\bOVDs?\b", r"\bC-?KYCR?\b", r"beneficial owner",
+    ],
+    "Anti-Money Laundering": [
+        r"money[- ]laundering", r"\bAML\b", r"\bPMLA?\b", r"\bCFT\b", r"terrorist financing",
+        r"suspicious transaction", r"\bFIU(?:-IND)?\b", r"\bFATF\b", r"\bUAPA\b", r"sanctions? list",
+    ],
+    "Grievance Redressal Mechanism": [
+        r"grievance", r"redressal", r"ombudsman", r"complaints?\b", r"customer service",
+    ],
+    "Loan Restructuring": [
+        r"restructur", r"resolution plan", r"moratorium", r"\bNPAs?\b", r"stressed assets?",
+        r"one[- ]time settlement", r"asset classification", r"compromise settlement",
+    ],
+    "Export-Import Control": [
+        r"\b(?:export|import)(?:s|ers?|ing|ed)?\b", r"\bEXIM\b", r"\bEDPMS\b", r"\bIDPMS\b",
+        r"trade credit", r"merchanting trade", r"shipping bill", r"bill of entry",
+    ],
+    "Foreign Exchange Management Act": [
+        r"\bFEMA\b", r"foreign exchange management", r"A\.\s?P\.\s?\(DIR Series\)", r"authori[sz]ed dealer",
+        r"\bAD Category", r"\bECBs?\b", r"external commercial borrowing", r"\bLRS\b",
+        r"liberali[sz]ed remittance", r"overseas (?:direct )?investment", r"foreign (?:direct )?investment",
+        r"\bODI\b", r"\bFDI\b",
+    ],
+}
+_COMPILED_RULES = {category: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+                   for category, patterns in KEYWORD_RULES.items()}
+
+
+# Whole-word alias matches (plurals and "-ers"/"-ing" forms allowed), so "Important note" is not "import";
+# spaces and hyphens inside an alias are interchangeable ("money-laundering")
+def _alias_pattern(aliases):
+    words = (r"[\s-]+".join(re.escape(part) for part in re.split(r"[\s-]+", alias)) for alias in aliases)
+    return re.compile(r"\b(?:" + "|".join(words) + r")(?:s|es|ers?|ing)?\b", re.IGNORECASE)
+
+
+_ALIAS_PATTERNS = {category: _alias_pattern(aliases) for category, aliases in COMPLIANCE_TYPES.items()}
+
+
+def canonical_types(compliance_types):
+    """Map the LLM's free-form tags ("KYC Compliance", "FEMA") onto COMPLIANCE_TYPES names."""
+    if isinstance(compliance_types, str):
+        compliance_types = re.split(r"[,;\n]", compliance_types)
+    found = []
+    for tag in compliance_types or []:
+        for category, pattern in _ALIAS_PATTERNS.items():
+            if pattern.search(str(tag)) and category not in found:
+                found.append(category)
+    return [category for category in COMPLIANCE_TYPES if category in found]
+
+
+def rule_hits(text):
+    """Number of rule matches per compliance type."""
+    return {category: sum(len(pattern.findall(text)) for pattern in patterns)
+            for category, patterns in _COMPILED_RULES.items()}
+
+
+class TfidfPreClassifier:
+    """Optional one-vs-rest TF-IDF + logistic regression classifier trained on saved LLM outputs.
+
+    Needs scikit-learn, which is not a hard dependency of this project.
+    """
+
+    def __init__(self):
+        try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.linear_model import LogisticRegression
+            from sklearn.multiclass import OneVsRestClassifier
+            from sklearn.preprocessing import MultiLabelBinarizer
+        except ImportError as e:
+            raise ImportError("TfidfPreClassifier requires scikit-learn: pip install scikit-learn") from e
+        self.vectorizer = TfidfVectorizer(sublinear_tf=True, max_features=50000, ngram_range=(1, 2), min_df=2)
+        self.binarizer = MultiLabelBinarizer(classes=list(COMPLIANCE_TYPES))
+        self.model = OneVsRestClassifier(LogisticRegression(max_iter=1000, class_weight="balanced"))
+
+    def fit(self, texts, labels):
+        """Train on circular texts and their canonical compliance types."""
+        features = self.vectorizer.fit_transform(texts)
+        self.model.fit(features, self.binarizer.fit_transform(labels))
+        return self
+
+    def predict_scores(self, text):
+        probabilities = self.model.predict_proba(self.vectorizer.transform([text]))[0]
+        return dict(zip(self.binarizer.classes_, (float(p) for p in probabilities)))
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            pickle.dump(self, file)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as file:
+            return pickle.load(file)
+
+
+class PreClassifier:
+    """Cheap local tagger run before the analysis crew.
+
+    A circular is tagged with every compliance type that has at least ``min_hits`` rule
+    matches or, when a TF-IDF model is loaded, a model score above ``threshold``.
+    """
+
+    def __init__(self, model: TfidfPreClassifier = None, min_hits: int = PRECLASSIFIER_MIN_HITS,
+                 threshold: float = PRECLASSIFIER_THRESHOLD):
+        self.model = model
+        self.min_hits = min_hits
+        self.threshold = threshold
+
+    @classmethod
+    def from_env(cls):
+        model = None
+        if PRECLASSIFIER_MODEL:
+            try:
+                model = TfidfPreClassifier.load(PRECLASSIFIER_MODEL)
+            except Exception as e:
+                logging.error(f"Could not load pre-classifier model {PRECLASSIFIER_MODEL}: {e}")
+        return cls(model=model)
+
+    def classify(self, text):
+        """Return ``{"tags": [...], "rule_hits": {...}, "model_scores": {...}}`` for a circular text."""
+        hits = rule_hits(text or "")
+        scores = self.model.predict_scores(text or "") if self.model is not None else {}
+        tags = [category for category in COMPLIANCE_TYPES
+                if hits[category] >= self.min_hits or scores.get(category, 0.0) >= self.threshold]
+        return {"tags": tags, "rule_hits": hits, "model_scores": scores}
+
+    def tag(self, text):
+        return self.classify(text)["tags"]
@@ -0,0 +1,135 @@
+import argparse
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+from src.components.pipeline import CircularPipeline, notifications_for_range
+from src.utils.ingest_state import IngestState
+from src.utils.metrics import metrics
+import json
+
+# ✅ Logging is configured by the entry points only, LOG_LEVEL=DEBUG for the full trace
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+#--------------------------------#
+#        Headless Ingest         #
+#--------------------------------#
+def ingest_range(start_date, end_date, analyse=True, state=None, kind="ingest"):
+    """Scrape, extract, analyse and index every circular between two dates.
+
+    Circulars stream through the staged pipeline, so extraction, analysis and indexing
+    start as soon as the first month page has been scraped. Runs are idempotent: every
+    circular is checkpointed by ``downloaded_url`` once indexed and skipped by later runs,
+    so an interrupted run resumes where it stopped. Circulars indexed by a ``--skip-analysis``
+    run are analysed by the next run that analyses.
+
+    Returns:
+        dict: counts of ``dates``, ``circulars``, ``indexed`` and ``failed`` documents
+    """
+    state = state or IngestState()
+    run_id = state.start_run(kind, start_date, end_date)
+    totals = {"dates": 0, "circulars": 0, "indexed": 0, "failed": 0}
+    pipeline = CircularPipeline(analyse=analyse)
+    try:
+        for event in pipeline.run(state.pending(notifications_for_range(start_date, end_date), analyse=analyse)):
+            if event["event"] == "found":
+                logging.info(f"Ingesting {event['count']} new circulars for {event['date']}")
+                totals["dates"] += 1
+                totals["circulars"] += event["count"]
+            elif event["event"] == "indexed":
+                totals["indexed" if event["ok"] else "failed"] += 1
+                if event["circular"]:
+                    state.mark(event["circular"], "indexed" if event["ok"] else "failed", event["error"],
+                               analysed=analyse)
+            elif event["event"] == "failed":
+                totals["failed"] += 1
+                if event["circular"]:
+                    state.mark(event["circular"].get("notification", event["circular"]), "failed", event["error"])
+    except BaseException:
+        state.finish_run(run_id, "interrupted", totals)
+        raise
+    state.finish_run(run_id, "failed" if totals["failed"] else "complete", totals)
+    return totals
+
+
+def backfill_range(start_date, end_date, analyse=True):
+    """Backfill a historical date range, see :func:`ingest_range`."""
+    return ingest_range(start_date, end_date, analyse=analyse, kind="backfill")
+
+
+def run_daemon(at="07:30", lookback_days=3, analyse=True):
+    """Ingest the last ``lookback_days`` days once a day at ``at`` (HH:MM, local time), forever.
+
+    The lookback picks up circulars RBI publishes late; already indexed ones are skipped.
+    """
+    hour, minute = (int(part) for part in at.split(":"))
+    while True:
+        now = datetime.now()
+        next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        logging.info(f"Next daily ingest at {next_run:%Y-%m-%d %H:%M}")
+        time.sleep((next_run - now).total_seconds())
+        today = date.today()
+        try:
+            totals = ingest_range(today - timedelta(days=lookback_days - 1), today, analyse=analyse, kind="daily")
+            logging.info(f"Daily ingest finished: {totals}")
+        except Exception as e:
+            # Keep the daemon alive, the checkpoint lets the next run pick up the remainder
+            logging.error(f"Daily ingest failed: {e}")
+
+
+#--------------------------------#
+#         CLI Entry Points       #
+#--------------------------------#
+def _add_range_arguments(parser):
+    parser.add_argument("--start", type=_parse_date, help="First date, YYYY-MM-DD (defaults to today)")
+    parser.add_argument("--end", type=_parse_date, help="Last date, YYYY-MM-DD (defaults to --start)")
+    parser.add_argument("--skip-analysis", action="store_true", help="Index extracted text without running the crew")
+
+
+def backfill(argv=None):
+    """CLI entry point: ``backfill --start 2025-01-01 --end 2025-03-31``"""
+    parser = argparse.ArgumentParser(description="Backfill RBI circulars for a date range into Elasticsearch")
+    _add_range_arguments(parser)
+    args = parser.parse_args(argv)
+    start = args.start or date.today()
+    totals = backfill_range(start, args.end or start, analyse=not args.skip_analysis)
+    print(json.dumps(totals, indent=4))
+
+
+def run(argv=None):
+    """CLI entry point: ``compliance_agentic_ai {ingest,backfill,daemon,split-texts}``"""
+    parser = argparse.ArgumentParser(description="Headless RBI circular ingest into Elasticsearch")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command in ("ingest", "backfill"):
+        _add_range_arguments(commands.add_parser(command, help=f"{command.capitalize()} a date range once"))
+    daemon = commands.add_parser("daemon", help="Ingest recent circulars once a day")
+    daemon.add_argument("--at", default="07:30", help="Local time of the daily run, HH:MM")
+    daemon.add_argument("--lookback-days", type=int, default=3, help="Days re-checked on every run")
+    daemon.add_argument("--skip-analysis", action="store_true", help="Index extracted text without running the crew")
+    commands.add_parser("split-texts", help="Move circular texts stored inline into the compressed text index")
+    args = parser.parse_args(argv)
+    # Prometheus endpoint for long runs, when METRICS_PORT is set
+    metrics.start_server()
+
+    if args.command == "split-texts":
+        from src.components.elasticsearch_oper import ElasticSearchTool
+        print(f"Moved the text of {ElasticSearchTool().split_inline_texts()} circulars")
+        return
+    if args.command == "daemon":
+        run_daemon(at=args.at, lookback_days=args.lookback_days, analyse=not args.skip_analysis)
+        return
+    start = args.start or date.today()
+    totals = ingest_range(start, args.end or start, analyse=not args.skip_analysis, kind=args.command)
+    print(json.dumps(totals, indent=4))
+    print(json.dumps(metrics.summary_rows(), indent=4))
+
+
+if __name__ == "__main__":
+    run()
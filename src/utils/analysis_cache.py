@@ -0,0 +1,73 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+#--------------------------------#
+#     LLM Result Memoisation     #
+#--------------------------------#
+ANALYSIS_CACHE_DB = os.getenv("ANALYSIS_CACHE_DB", os.path.join("db", "analysis_cache.sqlite3"))
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+
+def cache_key(text, *parts):
+    """Hash the circular text together with the prompt template and model name."""
+    digest = hashlib.sha256()
+    for part in (text, *parts):
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """SQLite-backed store of raw LLM outputs keyed by :func:`cache_key`."""
+
+    def __init__(self, db_path: str = ANALYSIS_CACHE_DB, ttl_seconds: int = ANALYSIS_CACHE_TTL_SECONDS):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_results ("
+                "key TEXT PRIMARY KEY, kind TEXT NOT NULL, raw TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        # A fresh connection per call keeps the cache safe to share across Streamlit threads
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, key):
+        """Return the cached raw output for ``key`` or None if missing or expired."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT raw, created_at FROM llm_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        raw, created_at = row
+        if self.ttl_seconds and time.time() - created_at > self.ttl_seconds:
+            self.invalidate(key)
+            return None
+        logging.debug(f"LLM result cache hit: {key}")
+        return raw
+
+    def set(self, key, kind, raw):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_results (key, kind, raw, created_at) VALUES (?, ?, ?, ?)",
+                (key, kind, raw, time.time()),
+            )
+
+    def invalidate(self, key=None, kind=None):
+        """Drop a single entry, every entry of a ``kind`` ("analysis"/"comparison"), or everything."""
+        with self._connect() as conn:
+            if key is not None:
+                conn.execute("DELETE FROM llm_results WHERE key = ?", (key,))
+            elif kind is not None:
+                conn.execute("DELETE FROM llm_results WHERE kind = ?", (kind,))
+            else:
+                conn.execute("DELETE FROM llm_results")
@@ -0,0 +1,88 @@
+import os
+import re
+
+#--------------------------------#
+#     Token-aware Chunking       #
+#--------------------------------#
+ANALYSIS_CHUNK_TOKENS = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "3000"))
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken missing or its encoding files unavailable offline
+    _encoding = None
+
+# Numbered clauses ("2.", "2.1", "(iv)"), roman numerals, chapters and annexes start a new section
+SECTION_START = re.compile(
+    r'^\s*(?:\d+(?:\.\d+)*\.?\s|\(?[ivxlc]+\)\s|[IVXLC]+\.\s|Chapter\s|CHAPTER\s|Annex|ANNEX|Section\s)'
+)
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+SENTENCE_END = re.compile(r'(?<=[.;:])\s+')
+
+
+def estimate_tokens(text):
+    """Count tokens with tiktoken when available, otherwise roughly four characters per token."""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def _sections(text):
+    """Split text into sections at numbered headings, keeping each heading with its body."""
+    sections, current = [], []
+    for line in text.splitlines(keepends=True):
+        if SECTION_START.match(line) and current:
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("".join(current))
+    return sections
+
+
+def split_sections(text):
+    """Numbered sections of a circular, further split at blank lines, stripped and non-empty.
+
+    The units amendment detection compares between two versions of a circular.
+    """
+    return [part.strip() for section in _sections(text or "")
+            for part in PARAGRAPH_BREAK.split(section) if part.strip()]
+
+
+def _split_oversized(piece, max_tokens):
+    """Break a piece that alone exceeds the budget at paragraph, then sentence, then character level."""
+    for pattern in (PARAGRAPH_BREAK, SENTENCE_END):
+        parts = [part for part in pattern.split(piece) if part.strip()]
+        if len(parts) > 1:
+            return [chunk for part in parts for chunk in
+                    (_split_oversized(part, max_tokens) if estimate_tokens(part) > max_tokens else [part])]
+    width = max(1, max_tokens * 4)
+    return [piece[i:i + width] for i in range(0, len(piece), width)]
+
+
+def split_circular(text, max_tokens=ANALYSIS_CHUNK_TOKENS):
+    """Split circular text into chunks of at most ``max_tokens``, on section and paragraph boundaries.
+
+    Consecutive sections are packed together greedily; a section larger than the
+    budget is split further on paragraph and sentence boundaries.
+    """
+    if not text:
+        return []
+    pieces = []
+    for section in _sections(text):
+        if estimate_tokens(section) > max_tokens:
+            pieces.extend(_split_oversized(section, max_tokens))
+        else:
+            pieces.append(section)
+
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        tokens = estimate_tokens(piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(current).strip())
+            current, current_tokens = [], 0
+        current.append(piece if piece.endswith("\n") else piece + "\n")
+        current_tokens += tokens
+    if current:
+        chunks.append("".join(current).strip())
+    return [chunk for chunk in chunks if chunk]
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+#--------------------------------#
+#     Ingest Checkpointing       #
+#--------------------------------#
+INGEST_STATE_DB = os.getenv("INGEST_STATE_DB", os.path.join("db", "ingest_state.sqlite3"))
+
+
+def circular_id(notification):
+    """Document id of a notification, the bare PDF file name used as ``downloaded_url``."""
+    return (notification.get("downloaded_url") or notification.get("pdf_url") or "").split('/')[-1]
+
+
+class IngestState:
+    """SQLite record of which circulars were ingested, so headless runs are idempotent and resumable.
+
+    Every circular is keyed by its ``downloaded_url`` and remembers its ``pdf_url``; once it
+    is marked ``indexed`` later runs skip it, while ``failed`` ones are picked up again on
+    the next run. Rows with a ``pdf_url`` are matched on it, so a different circular
+    reusing a file name is not mistaken for one already ingested. ``analysed`` records
+    whether the crew ran, so circulars indexed with ``--skip-analysis`` are picked up again
+    by the next analysing run.
+    """
+
+    def __init__(self, db_path: str = INGEST_STATE_DB):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS circulars ("
+                "downloaded_url TEXT PRIMARY KEY, circular_date TEXT, name TEXT, status TEXT NOT NULL, "
+                "error TEXT, updated_at REAL NOT NULL)"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(circulars)")]
+            if "pdf_url" not in columns:
+                conn.execute("ALTER TABLE circulars ADD COLUMN pdf_url TEXT")
+            if "analysed" not in columns:
+                # NULL for rows written before the column existed, those are treated as analysed
+                conn.execute("ALTER TABLE circulars ADD COLUMN analysed INTEGER")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "run_id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT, start_date TEXT, end_date TEXT, "
+                "status TEXT NOT NULL, totals TEXT, started_at REAL NOT NULL, finished_at REAL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def is_done(self, notification, analysed=False):
+        """Whether the circular was indexed, and with ``analysed`` also analysed."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT status, analysed FROM circulars WHERE pdf_url = ? "
+                               "OR (downloaded_url = ? AND pdf_url IS NULL) ORDER BY pdf_url IS NULL LIMIT 1",
+                               (notification.get("pdf_url"), circular_id(notification))).fetchone()
+        if row is None or row[0] != "indexed":
+            return False
+        return not analysed or row[1] is None or bool(row[1])
+
+    def mark(self, circular, status, error=None, analysed=True):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO circulars (downloaded_url, pdf_url, circular_date, name, status, error, "
+                "analysed, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (circular_id(circular), circular.get("pdf_url"), circular.get("circular_date"), circular.get("name"),
+                 status, None if error is None else str(error), int(analysed), time.time()),
+            )
+
+    def start_run(self, kind, start_date, end_date):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO runs (kind, start_date, end_date, status, started_at) VALUES (?, ?, ?, 'running', ?)",
+                (kind, str(start_date), str(end_date), time.time()),
+            )
+            return cursor.lastrowid
+
+    def finish_run(self, run_id, status, totals):
+        with self._connect() as conn:
+            conn.execute("UPDATE runs SET status = ?, totals = ?, finished_at = ? WHERE run_id = ?",
+                         (status, str(totals), time.time(), run_id))
+
+    def pending(self, source, analyse=False):
+        """Wrap a ``(date, notifications)`` source, dropping circulars that were already indexed.
+
+        With ``analyse`` circulars indexed without analysis are kept, so they get analysed.
+        """
+        for date_str, notifications in source:
+            remaining = [notification for notification in notifications
+                         if not self.is_done(notification, analysed=analyse)]
+            if remaining:
+                yield date_str, remaining
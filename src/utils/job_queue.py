@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+#--------------------------------#
+#     Background Job Queue       #
+#--------------------------------#
+JOB_QUEUE_DB = os.getenv("JOB_QUEUE_DB", os.path.join("db", "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+
+class JobQueue:
+    """Local worker pool whose job state lives in SQLite.
+
+    Jobs are keyed by the caller (e.g. a hash of their input), so submitting the same job
+    twice is a no-op and everyone polling that key shares one result. Handlers are
+    registered per ``kind`` and return a string result. Jobs left pending or running by
+    a previous process are picked up again on start.
+    """
+
+    def __init__(self, handlers, db_path: str = JOB_QUEUE_DB, workers: int = JOB_WORKERS):
+        """
+        Args:
+            handlers (dict): ``{kind: callable(payload) -> str}``
+            db_path (str): SQLite file holding the job table
+            workers (int): Jobs run at the same time
+        """
+        self.handlers = handlers
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._queue = queue.Queue()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_key TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, "
+                "result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            # Jobs interrupted by a restart run again
+            conn.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'")
+            pending = [row[0] for row in conn.execute("SELECT job_key FROM jobs WHERE status = 'pending' "
+                                                      "ORDER BY created_at")]
+        for job_key in pending:
+            self._queue.put(job_key)
+        for index in range(max(1, workers)):
+            threading.Thread(target=self._worker, name=f"job-worker-{index}", daemon=True).start()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def submit(self, kind, job_key, payload, force=False):
+        """Queue a job unless one with ``job_key`` exists; ``force`` re-runs a finished or failed one.
+
+        Returns:
+            bool: True if the job was (re)queued
+        """
+        now = time.time()
+        with self._connect() as conn:
+            queued = conn.execute(
+                "INSERT OR IGNORE INTO jobs (job_key, kind, payload, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'pending', ?, ?)", (job_key, kind, json.dumps(payload), now, now)).rowcount
+            if not queued and force:
+                queued = conn.execute(
+                    "UPDATE jobs SET status = 'pending', payload = ?, result = NULL, error = NULL, updated_at = ? "
+                    "WHERE job_key = ? AND status IN ('done', 'failed')", (json.dumps(payload), now, job_key)).rowcount
+        if queued:
+            self._queue.put(job_key)
+        return bool(queued)
+
+    def retry(self, job_key):
+        """Queue a failed job again."""
+        with self._connect() as conn:
+            queued = conn.execute("UPDATE jobs SET status = 'pending', error = NULL, updated_at = ? "
+                                  "WHERE job_key = ? AND status = 'failed'", (time.time(), job_key)).rowcount
+        if queued:
+            self._queue.put(job_key)
+        return bool(queued)
+
+    def status(self, job_key):
+        """``{"status", "result", "error", "updated_at"}`` of a job, or None if it was never submitted."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT status, result, error, updated_at FROM jobs WHERE job_key = ?",
+                               (job_key,)).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "result": row[1], "error": row[2], "updated_at": row[3]}
+
+    def counts(self):
+        """Number of jobs per status."""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def _claim(self, job_key):
+        with self._connect() as conn:
+            claimed = conn.execute("UPDATE jobs SET status = 'running', updated_at = ? "
+                                   "WHERE job_key = ? AND status = 'pending'", (time.time(), job_key)).rowcount
+            if not claimed:
+                return None
+            return conn.execute("SELECT kind, payload FROM jobs WHERE job_key = ?", (job_key,)).fetchone()
+
+    def _finish(self, job_key, status, result=None, error=None):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE job_key = ?",
+                         (status, result, error, time.time(), job_key))
+
+    def _worker(self):
+        while True:
+            job_key = self._queue.get()
+            job = self._claim(job_key)
+            if job is None:
+                # Already taken by another worker, or a duplicate queue entry
+                continue
+            kind, payload = job
+            try:
+                result = self.handlers[kind](json.loads(payload))
+            except Exception as e:
+                logging.error(f"Job {kind} {job_key[:12]} failed: {e}")
+                self._finish(job_key, "failed", error=str(e))
+            else:
+                self._finish(job_key, "done", result=result)
@@ -0,0 +1,198 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+#--------------------------------#
+#     Pipeline Metrics/Tracing   #
+#--------------------------------#
+# Append every finished span to this JSONL file when set
+METRICS_TRACE_FILE = os.getenv("METRICS_TRACE_FILE")
+# Serve the metrics in the Prometheus text format on this port when set
+METRICS_PORT = os.getenv("METRICS_PORT")
+# Local only by default, set METRICS_HOST=0.0.0.0 to let a remote Prometheus scrape it
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# Samples kept per span name for percentiles
+METRICS_SAMPLES = int(os.getenv("METRICS_SAMPLES", "1000"))
+# Optional LLM prices (USD per 1000 tokens) used for the cost counter
+LLM_PROMPT_COST_PER_1K = float(os.getenv("LLM_PROMPT_COST_PER_1K", "0"))
+LLM_COMPLETION_COST_PER_1K = float(os.getenv("LLM_COMPLETION_COST_PER_1K", "0"))
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Metrics:
+    """Thread-safe, process-wide counters and span timings.
+
+    ``span`` times a pipeline stage (fetch, download, parse, LLM crew, Elasticsearch call),
+    ``incr`` counts bytes, pages, tokens and cache hits. Everything is kept in memory for
+    the UI summary, optionally exported in the Prometheus text format and, per span,
+    appended to a JSONL trace file.
+    """
+
+    def __init__(self, trace_file=METRICS_TRACE_FILE, samples=METRICS_SAMPLES):
+        self.trace_file = trace_file
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._spans = {}
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._server = None
+
+    def incr(self, name, value=1, **labels):
+        """Add ``value`` to counter ``name`` with the given labels."""
+        if not value:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, error=False):
+        """Record one ``seconds`` long occurrence of span ``name``."""
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = {"count": 0, "errors": 0, "seconds": 0.0, "max": 0.0,
+                                             "samples": deque(maxlen=self.samples)}
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["seconds"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            stats["samples"].append(seconds)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Time the enclosed block as span ``name``.
+
+        Yields a dict the block may add attributes to (sizes, counts); spans opened inside
+        it on the same thread are recorded as its children in the trace.
+        """
+        stack = self._local.__dict__.setdefault("stack", [])
+        span_id = next(self._ids)
+        parent = stack[-1] if stack else None
+        stack.append(span_id)
+        started_at = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield attributes
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            stack.pop()
+            self.observe(name, duration, error=error is not None)
+            if self.trace_file:
+                self._trace({"span": name, "id": span_id, "parent": parent, "thread": threading.current_thread().name,
+                             "start": started_at, "seconds": round(duration, 6), "attributes": attributes,
+                             "error": None if error is None else repr(error)})
+
+    def _trace(self, record):
+        line = json.dumps(record, default=str)
+        try:
+            with self._lock, open(self.trace_file, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+        except OSError as e:
+            logging.warning(f"Could not write trace to {self.trace_file}: {e}")
+
+    def record_llm_usage(self, kind, usage):
+        """Count prompt/completion tokens and their estimated cost from a CrewAI ``token_usage``."""
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        self.incr("llm_prompt_tokens_total", prompt, kind=kind)
+        self.incr("llm_completion_tokens_total", completion, kind=kind)
+        self.incr("llm_requests_total", getattr(usage, "successful_requests", 0) or 0, kind=kind)
+        self.incr("llm_cost_usd_total", prompt / 1000 * LLM_PROMPT_COST_PER_1K +
+                  completion / 1000 * LLM_COMPLETION_COST_PER_1K, kind=kind)
+
+    def snapshot(self):
+        """Current values as ``{"spans": {name: stats}, "counters": {name: {labels: value}}}``."""
+        with self._lock:
+            spans = {name: {"count": stats["count"], "errors": stats["errors"], "seconds": stats["seconds"],
+                            "max": stats["max"], "p50": _percentile(stats["samples"], 0.5),
+                            "p95": _percentile(stats["samples"], 0.95)}
+                     for name, stats in self._spans.items()}
+            counters = {}
+            for (name, labels), value in self._counters.items():
+                counters.setdefault(name, {})[",".join(f"{key}={val}" for key, val in labels)] = value
+        return {"spans": spans, "counters": counters}
+
+    def summary_rows(self):
+        """One row per span, slowest total first, for a table in the UI."""
+        spans = self.snapshot()["spans"]
+        return [{"stage": name, "count": stats["count"], "errors": stats["errors"],
+                 "total_s": round(stats["seconds"], 3), "p50_ms": round(stats["p50"] * 1000, 1),
+                 "p95_ms": round(stats["p95"] * 1000, 1), "max_ms": round(stats["max"] * 1000, 1)}
+                for name, stats in sorted(spans.items(), key=lambda item: -item[1]["seconds"])]
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._spans.clear()
+
+    def render_prometheus(self):
+        """Metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            spans = sorted((name, dict(stats)) for name, stats in self._spans.items())
+        for (name, labels), value in counters:
+            rendered = ",".join(f'{key}="{val}"' for key, val in labels)
+            lines.append(f"circulars_{name}{{{rendered}}} {value}")
+        for name, stats in spans:
+            label = f'span="{name}"'
+            lines.append(f"circulars_span_seconds_count{{{label}}} {stats['count']}")
+            lines.append(f"circulars_span_seconds_sum{{{label}}} {stats['seconds']}")
+            lines.append(f"circulars_span_errors_total{{{label}}} {stats['errors']}")
+            for quantile in (0.5, 0.95):
+                lines.append(f'circulars_span_seconds{{{label},quantile="{quantile}"}} '
+                             f"{_percentile(stats['samples'], quantile)}")
+        return "\n".join(lines) + "\n"
+
+    def start_server(self, port=METRICS_PORT, host=METRICS_HOST):
+        """Serve ``/metrics`` on ``host:port`` from a daemon thread, once per process. No-op without a port."""
+        if not port:
+            return None
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        with self._lock:
+            if self._server is None:
+                self._server = ThreadingHTTPServer((host, int(port)), Handler)
+                threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+                logging.info(f"Serving Prometheus metrics on {host}:{port}")
+        return self._server
+
+
+# ✅ Shared registry used by every component
+metrics = Metrics()
@@ -3,20 +3,40 @@ import sys
 from contextlib import contextmanager
 from io import StringIO
 import re
+import threading
+import time
+from collections import OrderedDict, deque
 
 #--------------------------------#
 #         Output Handler         #
 #--------------------------------#
 class StreamlitProcessOutput:
-    def __init__(self, container):
+    ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+    def __init__(self, container, max_lines=500, dedup_window=2000, render_interval=0.25):
+        """
+        Args:
+            container: Streamlit container the log is rendered into
+            max_lines (int): Lines kept on screen, older lines drop off the top
+            dedup_window (int): Number of recent distinct lines remembered for de-duplication
+            render_interval (float): Minimum seconds between two re-renders
+        """
         self.container = container
-        self.output_text = ""
-        self.seen_lines = set()
+        self.lines = deque(maxlen=max_lines)
+        self.seen_lines = OrderedDict()
+        self.dedup_window = dedup_window
+        self.render_interval = render_interval
+        self._last_render = 0.0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @property
+    def output_text(self):
+        return '\n'.join(self.lines)
         
     def clean_text(self, text):
         # Remove ANSI escape codes
-        ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-        text = ansi_escape.sub('', text)
+        text = self.ANSI_ESCAPE.sub('', text)
         
         # Remove LiteLLM debug messages
         if text.strip().startswith('LiteLLM.Info:') or text.strip().startswith('Provider List:'):
@@ -25,32 +45,43 @@ class StreamlitProcessOutput:
         # Clean up the formatting
         text = text.replace('[1m', '').replace('[95m', '').replace('[92m', '').replace('[00m', '')
         return text
+
+    def _is_new(self, line):
+        """Bounded LRU de-duplication of recently seen lines."""
+        if line in self.seen_lines:
+            self.seen_lines.move_to_end(line)
+            return False
+        self.seen_lines[line] = None
+        if len(self.seen_lines) > self.dedup_window:
+            self.seen_lines.popitem(last=False)
+        return True
         
     def write(self, text):
         cleaned_text = self.clean_text(text)
         if cleaned_text is None:
             return
             
-        # Split into lines and process each line
-        lines = cleaned_text.split('\n')
-        new_lines = []
-        
-        for line in lines:
-            line = line.strip()
-            if line and line not in self.seen_lines:
-                self.seen_lines.add(line)
-                new_lines.append(line)
-        
-        if new_lines:
-            # Add the new lines to the output
-            new_content = '\n'.join(new_lines)
-            self.output_text = f"{self.output_text}\n{new_content}" if self.output_text else new_content
-            
-            # Update the display
-            self.container.text(self.output_text)
+        with self._lock:
+            # Split into lines and process each line
+            for line in cleaned_text.split('\n'):
+                line = line.strip()
+                if line and self._is_new(line):
+                    self.lines.append(line)
+                    self._dirty = True
+
+            # Re-render at most once per render_interval
+            if self._dirty and time.monotonic() - self._last_render >= self.render_interval:
+                self._render()
+
+    def _render(self):
+        self.container.text(self.output_text)
+        self._last_render = time.monotonic()
+        self._dirty = False
         
     def flush(self):
-        pass
+        with self._lock:
+            if self._dirty:
+                self._render()
 
 @contextmanager
 def capture_output(container):
@@ -63,6 +94,8 @@ def capture_output(container):
         yield string_io
     finally:
         sys.stdout = old_stdout
+        # Render whatever was buffered since the last throttled update
+        output_handler.flush()
 
 # Export the capture_output function
 __all__ = ['capture_output']
\ No newline at end of file
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+#--------------------------------#
+#        PDF / Text Cache        #
+#--------------------------------#
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "rbi_compliance", "pdfs"))
+PDF_CACHE_MAX_MB = int(os.getenv("PDF_CACHE_MAX_MB", "512"))
+# RBI rarely re-publishes a PDF under the same URL, so entries are trusted for a day
+# before an ETag / Last-Modified revalidation round-trip is made.
+PDF_CACHE_REVALIDATE_SECONDS = int(os.getenv("PDF_CACHE_REVALIDATE_SECONDS", str(24 * 3600)))
+
+
+class PDFCache:
+    """Persistent cache of downloaded circular PDFs and their extracted text.
+
+    Entries are looked up by URL and stored content-addressed by the SHA-256 of the
+    PDF bytes, so the raw PDF lives at ``<sha>.pdf`` and its text at ``<sha>.txt``.
+    The URL index is a SQLite table, so every process and session sharing the directory
+    (the app, the daemon) sees the same entries. The total size of the blobs on disk is
+    capped and the least recently used ones are evicted first.
+    """
+
+    INDEX_DB = "index.sqlite3"
+    LEGACY_INDEX_FILE = "index.json"
+    COLUMNS = ("sha256", "etag", "last_modified", "size", "validated_at", "last_access")
+
+    def __init__(self, cache_dir: str = PDF_CACHE_DIR, max_mb: int = PDF_CACHE_MAX_MB,
+                 revalidate_seconds: int = PDF_CACHE_REVALIDATE_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb * 1024 * 1024
+        self.revalidate_seconds = revalidate_seconds
+        self._lock = threading.Lock()
+        self.stats = {"pdf_hits": 0, "pdf_misses": 0, "text_hits": 0, "text_misses": 0,
+                      "revalidations": 0, "evictions": 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, etag TEXT, last_modified TEXT, size INTEGER, "
+                "validated_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_sha256 ON entries (sha256)")
+        self._import_legacy_index()
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, name)
+
+    def _connect(self):
+        # A fresh connection per call, shared safely by download threads and other processes
+        return sqlite3.connect(self._path(self.INDEX_DB), timeout=30)
+
+    def _import_legacy_index(self):
+        """Move entries of the JSON index used by earlier versions into the SQLite index."""
+        path = self._path(self.LEGACY_INDEX_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                legacy = json.load(file)
+        except (OSError, ValueError):
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO entries (url, sha256, etag, last_modified, size, validated_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(url, *(entry.get(column) for column in self.COLUMNS)) for url, entry in legacy.items()])
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def pdf_path(self, entry):
+        return self._path(f"{entry['sha256']}.pdf")
+
+    def text_path(self, entry):
+        return self._path(f"{entry['sha256']}.txt")
+
+    def get(self, url):
+        """Return the cache entry for ``url`` or None if it is not cached."""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM entries WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            entry = dict(zip(self.COLUMNS, row))
+            if not os.path.exists(self.pdf_path(entry)):
+                # Blob removed behind our back, forget the entry
+                conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+                return None
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry["validated_at"] < self.revalidate_seconds
+
+    def validators(self, entry):
+        """Conditional request headers for revalidating ``entry``."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record_hit(self, url, revalidated=False):
+        """Mark ``url`` as used (and optionally as revalidated with a 304)."""
+        now = time.time()
+        with self._connect() as conn:
+            if revalidated:
+                updated = conn.execute("UPDATE entries SET last_access = ?, validated_at = ? WHERE url = ?",
+                                       (now, now, url)).rowcount
+            else:
+                updated = conn.execute("UPDATE entries SET last_access = ? WHERE url = ?", (now, url)).rowcount
+        if updated:
+            with self._lock:
+                self.stats["pdf_hits"] += 1
+                if revalidated:
+                    self.stats["revalidations"] += 1
+
+    def put_pdf(self, url, content: bytes, etag=None, last_modified=None):
+        """Store freshly downloaded PDF bytes for ``url`` and return its entry."""
+        sha256 = hashlib.sha256(content).hexdigest()
+        entry = {"sha256": sha256, "etag": etag, "last_modified": last_modified,
+                 "size": len(content), "validated_at": time.time(), "last_access": time.time()}
+        path = self.pdf_path(entry)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(content)
+            os.replace(tmp_path, path)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (url, sha256, etag, last_modified, size, validated_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (url, *(entry[column] for column in self.COLUMNS)))
+        with self._lock:
+            self.stats["pdf_misses"] += 1
+        self._evict()
+        return dict(entry)
+
+    def get_text(self, entry):
+        """Return the cached extracted text for ``entry`` or None."""
+        try:
+            with open(self.text_path(entry), "r", encoding="utf-8") as file:
+                text = file.read()
+        except OSError:
+            with self._lock:
+                self.stats["text_misses"] += 1
+            return None
+        with self._lock:
+            self.stats["text_hits"] += 1
+        return text
+
+    def put_text(self, entry, text):
+        path = self.text_path(entry)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _disk_blobs(self):
+        """``{sha256: [bytes, newest mtime]}`` of every PDF/text blob on disk, indexed or not."""
+        blobs = {}
+        with os.scandir(self.cache_dir) as entries:
+            for item in entries:
+                sha256, _, ext = item.name.partition(".")
+                if ext not in ("pdf", "txt"):
+                    continue
+                try:
+                    stat = item.stat()
+                except OSError:
+                    continue
+                blob = blobs.setdefault(sha256, [0, 0.0])
+                blob[0] += stat.st_size
+                blob[1] = max(blob[1], stat.st_mtime)
+        return blobs
+
+    def _evict(self):
+        """Drop least recently used blobs until the files on disk fit in ``max_bytes``."""
+        with self._lock:
+            blobs = self._disk_blobs()
+            total = sum(size for size, _ in blobs.values())
+            if total <= self.max_bytes:
+                return
+            with self._connect() as conn:
+                last_access = dict(conn.execute("SELECT sha256, MAX(last_access) FROM entries GROUP BY sha256"))
+                # Blobs no index entry points to (e.g. left by a crash) go first, then by last use
+                ranked = sorted(blobs, key=lambda sha256: (sha256 in last_access,
+                                                           last_access.get(sha256, blobs[sha256][1])))
+                for sha256 in ranked:
+                    if total <= self.max_bytes:
+                        break
+                    total -= blobs[sha256][0]
+                    for ext in ("pdf", "txt"):
+                        try:
+                            os.remove(self._path(f"{sha256}.{ext}"))
+                        except OSError:
+                            pass
+                    conn.execute("DELETE FROM entries WHERE sha256 = ?", (sha256,))
+                    self.stats["evictions"] += 1
+                    logging.debug(f"Evicted cached PDF {sha256}")
+
+
+_pdf_cache = None
+_pdf_cache_lock = threading.Lock()
+
+
+def get_pdf_cache():
+    """Process-wide :class:`PDFCache` for PDF_CACHE_DIR, shared by every extractor."""
+    global _pdf_cache
+    with _pdf_cache_lock:
+        if _pdf_cache is None:
+            _pdf_cache = PDFCache()
+        return _pdf_cache
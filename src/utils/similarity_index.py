@@ -0,0 +1,231 @@
+import hashlib
+import os
+import re
+import threading
+import zlib
+import numpy as np
+from dotenv import load_dotenv
+from src.utils.chunking import split_sections
+
+load_dotenv()
+
+#--------------------------------#
+#   MinHash/LSH Similarity Index #
+#--------------------------------#
+SIMILARITY_INDEX_PATH = os.getenv("SIMILARITY_INDEX_PATH", os.path.join("db", "similarity_index.npz"))
+SIMILARITY_NUM_PERM = int(os.getenv("SIMILARITY_NUM_PERM", "128"))
+SIMILARITY_BANDS = int(os.getenv("SIMILARITY_BANDS", "32"))
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.8"))
+SHINGLE_WORDS = 5
+# Shingles hashed per NumPy step, bounding the temporaries to block x num_perm values
+SIGNATURE_BLOCK = 4096
+
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalise(text):
+    """Lower-cased words only, so layout, punctuation and page breaks do not count as changes."""
+    return " ".join(WORD_PATTERN.findall((text or "").lower()))
+
+
+def content_hash(text):
+    """SHA-256 of the normalised text, equal for exact re-issues of a circular."""
+    return hashlib.sha256(normalise(text).encode("utf-8")).hexdigest()
+
+
+def section_hashes(text):
+    """64-bit hashes of the normalised sections of a circular, in order."""
+    return np.array([int.from_bytes(hashlib.blake2b(normalise(section).encode("utf-8"), digest_size=8).digest(),
+                                    "little") for section in split_sections(text)], dtype=np.uint64)
+
+
+def _shingles(text):
+    words = normalise(text).split()
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+class SimilarityIndex:
+    """Near-duplicate index over circular texts.
+
+    Every circular is stored as one row of compact NumPy arrays: a MinHash signature of
+    its word 5-gram shingles (``num_perm`` uint32 values), the hash of its normalised
+    text and the hashes of its sections (one flat uint64 array plus offsets). LSH buckets
+    over ``bands`` signature bands are rebuilt in memory on load, so a lookup only
+    compares signatures of candidates sharing a band. Persisted as one ``.npz`` file.
+    """
+
+    def __init__(self, path: str = SIMILARITY_INDEX_PATH, num_perm: int = SIMILARITY_NUM_PERM,
+                 bands: int = SIMILARITY_BANDS, threshold: float = SIMILARITY_THRESHOLD):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.threshold = threshold
+        # Fixed seed: persisted signatures must stay comparable across processes
+        generator = np.random.RandomState(1)
+        self._a = generator.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+        self._b = generator.randint(0, 2 ** 31, size=num_perm).astype(np.uint64)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        self.ids, self.urls, self.hashes = [], [], []
+        self.signatures = np.empty((0, self.num_perm), dtype=np.uint32)
+        self.sections = np.empty(0, dtype=np.uint64)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        stored = self._read()
+        if stored is not None:
+            self.ids = stored["ids"].tolist()
+            self.urls = stored["urls"].tolist()
+            self.hashes = stored["hashes"].tolist()
+            self.signatures = stored["signatures"]
+            self.sections = stored["sections"]
+            self.offsets = stored["offsets"]
+        # Rows retired by a re-index keep their slot with an empty id and are never matched
+        live = [row for row, doc_id in enumerate(self.ids) if doc_id]
+        self.rows = {self.ids[row]: row for row in live}
+        self.by_hash = {self.hashes[row]: row for row in live}
+        self.buckets = {}
+        for row in live:
+            for key in self._band_keys(self.signatures[row]):
+                self.buckets.setdefault(key, []).append(row)
+
+    def _read(self):
+        """Arrays saved at ``path``, or None if there are none for this ``num_perm``."""
+        if not os.path.exists(self.path):
+            return None
+        with np.load(self.path, allow_pickle=False) as data:
+            if data["signatures"].shape[1] != self.num_perm:
+                return None
+            return {name: data[name] for name in ("ids", "urls", "hashes", "signatures", "sections", "offsets")}
+
+    def save(self):
+        """Write the index to ``path`` if it changed since the last save.
+
+        Rows another process (the app, the daemon) saved since this index was loaded are
+        merged in first; for a circular both indexed, this index's row wins.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            stored = self._read()
+            if stored is not None:
+                offsets = stored["offsets"]
+                for row, doc_id in enumerate(stored["ids"].tolist()):
+                    if doc_id and doc_id not in self.rows:
+                        self._append(doc_id, stored["urls"][row], stored["hashes"][row], stored["signatures"][row],
+                                     stored["sections"][offsets[row]:offsets[row + 1]])
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temporary = self.path + ".tmp.npz"
+            np.savez_compressed(temporary, ids=np.array(self.ids, dtype=str), urls=np.array(self.urls, dtype=str),
+                                hashes=np.array(self.hashes, dtype=str), signatures=self.signatures,
+                                sections=self.sections, offsets=self.offsets)
+            os.replace(temporary, self.path)
+            self._dirty = False
+
+    def signature(self, text):
+        """MinHash signature of ``text`` as ``num_perm`` uint32 values."""
+        shingles = _shingles(text)
+        if not shingles:
+            return np.full(self.num_perm, 0xFFFFFFFF, dtype=np.uint32)
+        values = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(values), SIGNATURE_BLOCK):
+            hashed = np.outer(values[start:start + SIGNATURE_BLOCK], self._a)
+            hashed += self._b
+            hashed %= _PRIME
+            hashed &= _MAX_HASH
+            np.minimum(signature, hashed.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes())
+                for band in range(self.bands)]
+
+    def url_for(self, doc_id):
+        """PDF URL indexed under ``doc_id``, or None."""
+        with self._lock:
+            row = self.rows.get(doc_id)
+            return None if row is None else self.urls[row]
+
+    def add(self, doc_id, pdf_url, text):
+        """Index (or re-index) one circular text under ``doc_id``."""
+        signature = self.signature(text)
+        sections = section_hashes(text)
+        text_hash = content_hash(text)
+        with self._lock:
+            if doc_id in self.rows:
+                # Re-issued under the same id: the old row stays in place but stops matching
+                self._retire(self.rows[doc_id])
+            self._append(doc_id, pdf_url or "", text_hash, signature, sections)
+            self._dirty = True
+
+    def _append(self, doc_id, pdf_url, text_hash, signature, sections):
+        row = len(self.ids)
+        self.ids.append(doc_id)
+        self.urls.append(str(pdf_url))
+        self.hashes.append(str(text_hash))
+        self.signatures = np.vstack([self.signatures, signature[None, :]])
+        self.sections = np.concatenate([self.sections, sections])
+        self.offsets = np.append(self.offsets, self.offsets[-1] + len(sections))
+        self.rows[doc_id] = row
+        self.by_hash[self.hashes[row]] = row
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(row)
+
+    def _retire(self, row):
+        for key in self._band_keys(self.signatures[row]):
+            rows = self.buckets.get(key)
+            if rows and row in rows:
+                rows.remove(row)
+        if self.by_hash.get(self.hashes[row]) == row:
+            del self.by_hash[self.hashes[row]]
+        self.ids[row] = ""
+
+    def match(self, text, exclude=None):
+        """Best indexed match for ``text``.
+
+        Args:
+            text (str): Circular text to look up
+            exclude (str): Document id never returned, the circular's own id when it is re-ingested
+
+        Returns:
+            dict: ``{"doc_id", "kind": "exact"|"near", "similarity", "changed_sections": [...]}`` where
+            ``changed_sections`` are the sections of ``text`` absent from the match; None without a match
+        """
+        text_hash = content_hash(text)
+        with self._lock:
+            row = self.by_hash.get(text_hash)
+            if row is not None and self.ids[row] != exclude:
+                return {"doc_id": self.ids[row], "kind": "exact", "similarity": 1.0, "changed_sections": []}
+        signature = self.signature(text)
+        with self._lock:
+            candidates = {row for key in self._band_keys(signature) for row in self.buckets.get(key, ())
+                          if self.ids[row] != exclude}
+            if not candidates:
+                return None
+            rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            similarities = (self.signatures[rows] == signature).mean(axis=1)
+            best = int(np.argmax(similarities))
+            row, similarity = int(rows[best]), float(similarities[best])
+            if similarity < self.threshold:
+                return None
+            if self.hashes[row] == text_hash:
+                # An exact copy hidden behind the excluded row in by_hash
+                return {"doc_id": self.ids[row], "kind": "exact", "similarity": 1.0, "changed_sections": []}
+            known = set(self.sections[self.offsets[row]:self.offsets[row + 1]].tolist())
+            doc_id = self.ids[row]
+        sections = split_sections(text)
+        changed = [section for section, section_hash in zip(sections, section_hashes(text).tolist())
+                   if section_hash not in known]
+        return {"doc_id": doc_id, "kind": "near", "similarity": round(similarity, 4), "changed_sections": changed}
@@ -0,0 +1,161 @@
+import ast
+import json
+import re
+from typing import List, Union
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+#--------------------------------#
+#       Crew Output Schemas      #
+#--------------------------------#
+class StructuredOutputError(ValueError):
+    """A crew answer that could not be turned into the expected report."""
+
+    def __init__(self, message, raw=None):
+        super().__init__(message)
+        self.raw = raw
+
+
+def _as_list(value):
+    """Accept "a, b" or a single value where the prompt asks for a list."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in re.split(r"[,;\n]", value) if part.strip()]
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+class ComplianceTypeDetail(BaseModel):
+    type: str
+    sections: List[str] = []
+    description: str = ""
+
+    @field_validator("sections", mode="before")
+    @classmethod
+    def _sections(cls, value):
+        return [str(section) for section in _as_list(value)]
+
+
+class AnalysisReport(BaseModel):
+    """What the analyser must return for a circular (or a chunk of one).
+
+    ``summary`` and ``compliance_types`` are required, so an unrelated JSON object (e.g. an
+    API error echoed by the model) fails validation instead of becoming an empty report.
+    """
+    summary: str
+    compliance_types: List[str]
+    compliance_types_details: List[ComplianceTypeDetail] = []
+
+    @field_validator("compliance_types", mode="before")
+    @classmethod
+    def _types(cls, value):
+        return [str(tag) for tag in _as_list(value)]
+
+
+class ComparisonUpdate(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    category: str = ""
+    rbi_reference: str = ""
+    company_reference: str = ""
+    key_differences: str = ""
+
+
+class ActionItem(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    priority: str = ""
+    recommendation: str = ""
+
+
+class ComparisonReport(BaseModel):
+    """What the comparator must return, keyed the way the prompt (and the UI) spell it; the flag is required."""
+    model_config = ConfigDict(extra="allow", populate_by_name=True)
+    compliant_flag: str = Field(alias="Compliant Flag")
+    comparison_updates: List[ComparisonUpdate] = Field([], alias="comparison updates")
+    action_items: List[ActionItem] = []
+    risk_mitigations: Union[str, List[Union[str, dict]]] = Field("", alias="risk mitigations")
+
+
+REPORT_MODELS = {"analysis": AnalysisReport, "comparison": ComparisonReport}
+
+#--------------------------------#
+#      Tolerant JSON Parsing     #
+#--------------------------------#
+FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+def _json_objects(text):
+    """Yield every balanced ``{...}`` span in ``text``, outermost first, skipping braces inside strings."""
+    start = text.find("{")
+    while start != -1:
+        depth, in_string, escaped = 0, None, False
+        for position in range(start, len(text)):
+            char = text[position]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == in_string:
+                    in_string = None
+            elif char in "\"'" and (char == '"' or text[position - 1] in "{[,: \n\t"):
+                in_string = char
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    yield text[start:position + 1]
+                    break
+        start = text.find("{", start + 1)
+
+
+def _loads(candidate):
+    """json.loads with the usual LLM slips repaired: trailing commas, Python literals, single quotes."""
+    attempts = (candidate, TRAILING_COMMA_PATTERN.sub(r"\1", candidate))
+    for attempt in attempts:
+        try:
+            return json.loads(attempt)
+        except ValueError:
+            pass
+    try:
+        value = ast.literal_eval(attempts[1])
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def extract_json(text):
+    """Pull the JSON object out of an LLM answer wrapped in prose or code fences.
+
+    Raises:
+        StructuredOutputError: when no JSON object can be recovered
+    """
+    text = text or ""
+    # Curly quotes are only straightened as a last resort, they are valid inside JSON strings
+    for variant in (text, text.translate(SMART_QUOTES)):
+        for candidate in [variant.strip(), *FENCE_PATTERN.findall(variant), *_json_objects(variant)]:
+            value = _loads(candidate.strip())
+            if isinstance(value, dict):
+                return value
+    raise StructuredOutputError("No JSON object found in the crew output", raw=text)
+
+
+def parse_report(kind, raw):
+    """Validate a crew answer for ``kind`` ("analysis" or "comparison") and return it as a dict.
+
+    Raises:
+        StructuredOutputError: when the answer is not JSON or does not match the report schema
+    """
+    try:
+        report = REPORT_MODELS[kind].model_validate(extract_json(raw))
+    except ValidationError as e:
+        raise StructuredOutputError(f"Invalid {kind} report: {e}", raw=raw) from e
+    return report.model_dump(by_alias=True)
+
+
+def normalise_output(kind, result):
+    """JSON of the validated report in a crew result (or a raw answer), repaired locally without asking the LLM again."""
+    return json.dumps(parse_report(kind, getattr(result, "raw", result)))
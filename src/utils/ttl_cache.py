@@ -0,0 +1,68 @@
+import threading
+import time
+
+#--------------------------------#
+#       In-process TTL Cache     #
+#--------------------------------#
+class TTLCache:
+    """Small thread-safe, process-wide cache whose entries expire after a TTL.
+
+    Shared by every Streamlit session in the process. Concurrent misses on the same
+    key are coalesced so only one caller computes the value.
+    """
+
+    def __init__(self, ttl_seconds, max_entries=256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl_seconds=None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                # Drop the entry closest to expiry to make room
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def get_or_set(self, key, factory, ttl_seconds=None):
+        """Return the cached value for ``key`` or compute it with ``factory()``.
+
+        Falsy results (e.g. a failed scrape returning ``{}``) are returned but not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another caller may have filled the entry while we waited
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                return entry[1]
+            value = factory()
+            if value:
+                self.set(key, value, ttl_seconds)
+            return value
@@ -0,0 +1,36 @@
+import json
+import pytest
+from benchmarks import standins
+
+# Every on-disk store in a scratch directory, before src reads its settings
+standins.configure_environment()
+
+from crewai import LLM
+from src.components.circular_analyzer import CircularService
+from src.utils.structured_output import StructuredOutputError, parse_report
+
+REPAIRABLE_ANSWER = ("Final Answer: {'summary': 'Revised KYC updation periods.', 'compliance_types': ['KYC Compliance'], "
+                     "'compliance_types_details': [{'type': 'KYC Compliance', 'sections': ['2'], 'description': 'x'},],}")
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls = []
+
+    def call(self, messages, *args, **kwargs):
+        calls.append(messages)
+        return f"Thought: I now know the final answer\n{REPAIRABLE_ANSWER}"
+
+    monkeypatch.setattr(LLM, "call", call)
+    return calls
+
+
+def test_repairable_answer_costs_one_llm_call(llm_calls):
+    result = CircularService(workers=1).analyse(json.dumps({"name": "c", "circular_text": "KYC"}), force_refresh=True)
+    assert len(llm_calls) == 1
+    assert json.loads(result.raw)["compliance_types"] == ["KYC Compliance"]
+
+
+def test_unrelated_json_is_rejected():
+    with pytest.raises(StructuredOutputError):
+        parse_report("analysis", 'I cannot help {"error": "rate limited"}')